@@ -26,6 +26,7 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
 
 # 環境変数読み込み
 load_dotenv()
@@ -39,19 +40,23 @@ _api_rate_limiter = {
     'google_maps': {'last_call': 0, 'min_interval': 0.1}  # 0.1秒間隔
 }
 _cache_lock = Lock()
+_rate_limit_lock = Lock()
+
+# AI大量検証で同時に実行するOpenAIリクエスト数の上限
+AI_VERIFICATION_MAX_WORKERS = 4
 
 def _rate_limit_api(api_name: str, min_interval: float = 1.0):
-    """API レート制限管理"""
-    current_time = time.time()
-    last_call = _api_rate_limiter.get(api_name, {}).get('last_call', 0)
-    time_since_last = current_time - last_call
+    """API レート制限管理（スレッドセーフ：呼び出し枠をロック下で予約してから待機）"""
+    with _rate_limit_lock:
+        limiter = _api_rate_limiter.setdefault(api_name, {'last_call': 0, 'min_interval': min_interval})
+        current_time = time.time()
+        scheduled_time = max(current_time, limiter['last_call'] + min_interval)
+        limiter['last_call'] = scheduled_time
     
-    if time_since_last < min_interval:
-        sleep_time = min_interval - time_since_last
+    sleep_time = scheduled_time - current_time
+    if sleep_time > 0:
         logger.info(f"🕒 {api_name} レート制限: {sleep_time:.2f}秒待機")
         time.sleep(sleep_time)
-    
-    _api_rate_limiter[api_name]['last_call'] = time.time()
 
 def _get_cache_key(text: str, api_type: str) -> str:
     """キャッシュキー生成"""
@@ -82,7 +87,7 @@ def _save_api_cache(cache: Dict):
 # グローバルキャッシュ初期化
 _api_cache = _load_api_cache()
 
-@dataclass
+@dataclass(slots=True)
 class ContextAnalysisResult:
     """文脈分析結果"""
     is_place_name: bool  # 地名として使われているか
@@ -93,7 +98,7 @@ class ContextAnalysisResult:
     reasoning: str      # 判断理由
     suggested_location: Optional[str] = None  # 推定地域
 
-@dataclass
+@dataclass(slots=True)
 class GeocodingResult:
     """Geocoding結果"""
     place_name: str
@@ -359,6 +364,12 @@ class ContextAwareGeocoder:
             "沖縄県": (26.2124, 127.6792, 0.95),
         }
         
+        # 接尾辞（都・府・県）を除いた都道府県名（照合のたびに置換しないよう事前計算）
+        self.prefecture_bases = tuple(
+            (pref_name, pref_name.replace('都', '').replace('府', '').replace('県', ''), coords)
+            for pref_name, coords in self.prefecture_coords.items()
+        )
+        
         # 海外地名データベース（文学作品頻出）
         self.foreign_places = {
             "ローマ": (41.9028, 12.4964, "イタリア", 0.90),
@@ -535,8 +546,8 @@ class ContextAwareGeocoder:
             )
         
         # 3. 都道府県データベースから検索
-        for pref_name, (lat, lon, confidence) in self.prefecture_coords.items():
-            if place_name in pref_name or pref_name.replace('都', '').replace('府', '').replace('県', '') == place_name:
+        for pref_name, pref_base, (lat, lon, confidence) in self.prefecture_bases:
+            if place_name in pref_name or pref_base == place_name:
                 return GeocodingResult(
                     place_name=place_name,
                     latitude=lat,
@@ -574,8 +585,7 @@ class ContextAwareGeocoder:
         """フォールバックGeocoding（部分マッチング + Google Maps API）"""
         
         # 1. 部分マッチング（都道府県）
-        for pref_name, (lat, lon, confidence) in self.prefecture_coords.items():
-            pref_base = pref_name.replace('都', '').replace('府', '').replace('県', '')
+        for pref_name, pref_base, (lat, lon, confidence) in self.prefecture_bases:
             if pref_base in place_name or place_name in pref_base:
                 return GeocodingResult(
                     place_name=place_name,
@@ -707,10 +717,9 @@ class ContextAwareGeocoder:
             # レート制限
             _rate_limit_api('openai', 1.0)
             
+            # 固定の指示を先頭・可変の地名と文章を末尾に置き、プロバイダ側のプレフィックスキャッシュを効かせる
             prompt = f"""
-以下の文章で使われている「{place_name}」について分析してください。
-
-文章: {sentence}
+末尾の文章で使われている対象の語について分析してください。
 
 以下の観点から分析し、JSON形式で回答してください：
 {{
@@ -724,6 +733,9 @@ class ContextAwareGeocoder:
 - 地名として使われているか、人名として使われているか
 - 文豪作品での文脈的意味
 - 歴史的・文学的な背景
+
+対象の語: {place_name}
+文章: {sentence}
 """
 
             response = self.openai_client.chat.completions.create(
@@ -1098,10 +1110,11 @@ class ContextAwareGeocoder:
         cursor = conn.cursor()
         
         # 検証対象の地名を取得（使用頻度が低い・未検証の地名を優先）
+        # 集約順は保証されないため、サンプル文は [sentence_id, 文] の組で集約し分析側で sentence_id 順に並べる
         query = '''
             SELECT pm.master_id, pm.display_name, pm.geocoding_confidence, pm.geocoding_source,
                    COUNT(sp.sentence_id) as usage_count,
-                   GROUP_CONCAT(s.sentence_text, '|||') as all_sentences
+                   json_group_array(json_array(s.sentence_id, s.sentence_text)) as all_sentences
             FROM place_masters pm
             JOIN sentence_places sp ON pm.master_id = sp.master_id
             JOIN sentences s ON sp.sentence_id = s.sentence_id
@@ -1125,68 +1138,100 @@ class ContextAwareGeocoder:
         
         logger.info(f"🤖 AI大量検証開始: {len(places_to_verify)}件")
         
-        for master_id, place_name, confidence, source_system, usage_count, all_sentences in places_to_verify:
-            try:
-                sentences = all_sentences.split('|||') if all_sentences else []
-                
-                # 複数文脈でのAI分析
-                ai_analyses = []
-                for sentence in sentences[:5]:  # 最大5文まで
-                    ai_result = self._enhanced_ai_analysis(place_name, sentence)
-                    if ai_result:
-                        ai_analyses.append(ai_result)
-                
-                if not ai_analyses:
+        # AI分析（ネットワーク待ち）は地名ごとに独立しているため同時実行数を制限して並列化し、
+        # 判定・DB更新は取得順にこのスレッドで行う
+        with ThreadPoolExecutor(max_workers=AI_VERIFICATION_MAX_WORKERS) as executor:
+            futures = [
+                executor.submit(self._analyze_place_samples, place_name, all_sentences)
+                for _, place_name, _, _, _, all_sentences in places_to_verify
+            ]
+            
+            for (master_id, place_name, confidence, source_system, usage_count, all_sentences), future in zip(places_to_verify, futures):
+                try:
+                    ai_analyses = future.result()
+                    
+                    if not ai_analyses:
+                        verification_results['ai_errors'] += 1
+                        continue
+                    
+                    # 総合判定
+                    overall_verdict = self._calculate_overall_verdict(ai_analyses)
+                    
+                    place_result = {
+                        'master_id': master_id,
+                        'place_name': place_name,
+                        'usage_count': usage_count,
+                        'current_confidence': confidence,
+                        'ai_analyses': ai_analyses,
+                        'overall_verdict': overall_verdict,
+                        'recommendation': overall_verdict['recommendation']
+                    }
+                    
+                    # 削除候補の判定
+                    if overall_verdict['is_valid'] == False and overall_verdict['confidence'] >= confidence_threshold:
+                        verification_results['deletion_candidates'].append(place_result)
+                        logger.info(f"❌ 削除候補: {place_name} (AI確信度: {overall_verdict['confidence']:.2f})")
+                    else:
+                        verification_results['verified_places'].append(place_result)
+                        # データベースに検証済みマークを付与
+                        cursor.execute(
+                            "UPDATE place_masters SET verification_status = 'ai_verified', ai_confidence = ? WHERE master_id = ?",
+                            (overall_verdict['confidence'], master_id)
+                        )
+                        logger.info(f"✅ 検証済み: {place_name} (AI確信度: {overall_verdict['confidence']:.2f})")
+                    
+                    verification_results['total_processed'] += 1
+                    
+                except Exception as e:
+                    logger.error(f"AI検証エラー ({place_name}): {str(e)}")
                     verification_results['ai_errors'] += 1
-                    continue
-                
-                # 総合判定
-                overall_verdict = self._calculate_overall_verdict(ai_analyses)
-                
-                place_result = {
-                    'master_id': master_id,
-                    'place_name': place_name,
-                    'usage_count': usage_count,
-                    'current_confidence': confidence,
-                    'ai_analyses': ai_analyses,
-                    'overall_verdict': overall_verdict,
-                    'recommendation': overall_verdict['recommendation']
-                }
-                
-                # 削除候補の判定
-                if overall_verdict['is_valid'] == False and overall_verdict['confidence'] >= confidence_threshold:
-                    verification_results['deletion_candidates'].append(place_result)
-                    logger.info(f"❌ 削除候補: {place_name} (AI確信度: {overall_verdict['confidence']:.2f})")
-                else:
-                    verification_results['verified_places'].append(place_result)
-                    # データベースに検証済みマークを付与
-                    cursor.execute(
-                        "UPDATE place_masters SET verification_status = 'ai_verified', ai_confidence = ? WHERE master_id = ?",
-                        (overall_verdict['confidence'], master_id)
-                    )
-                    logger.info(f"✅ 検証済み: {place_name} (AI確信度: {overall_verdict['confidence']:.2f})")
-                
-                verification_results['total_processed'] += 1
-                
-            except Exception as e:
-                logger.error(f"AI検証エラー ({place_name}): {str(e)}")
-                verification_results['ai_errors'] += 1
         
         conn.commit()
         conn.close()
         
         return verification_results
 
+    def _analyze_place_samples(self, place_name: str, all_sentences: Optional[str]) -> List[Dict[str, any]]:
+        """地名のサンプル文（sentence_id 順の先頭最大5文）をAI分析（all_sentences は [sentence_id, 文] の組のJSON配列）"""
+        sentence_rows = sorted(json.loads(all_sentences)) if all_sentences else []
+        sentences = [sentence for _, sentence in sentence_rows if sentence is not None][:5]
+        
+        # キャッシュチェック（同じ地名・サンプル文の再検証ではAPIを呼ばない）
+        cache_key = _get_cache_key(f"{place_name}:{'|||'.join(sentences)}", "openai_verification")
+        if cache_key in _api_cache:
+            logger.info(f"🎯 キャッシュヒット: {place_name}")
+            return _api_cache[cache_key]
+        
+        # 複数文脈でのAI分析（最大5文を1回のリクエストで判定）
+        ai_analyses = self._enhanced_ai_analysis_batch(place_name, sentences)
+        if ai_analyses is None:
+            # 一括応答を解析できない場合は1文ずつ分析
+            ai_analyses = []
+            for sentence in sentences:
+                ai_result = self._enhanced_ai_analysis(place_name, sentence)
+                if ai_result:
+                    ai_analyses.append(ai_result)
+        
+        if ai_analyses:
+            # 並列実行中の他スレッドと競合しないようロック下で登録
+            with _cache_lock:
+                _api_cache[cache_key] = ai_analyses
+            _save_api_cache(_api_cache)
+        
+        return ai_analyses
+
     def _enhanced_ai_analysis(self, place_name: str, sentence: str) -> Optional[Dict[str, any]]:
         """強化されたAI分析 - より詳細な判定"""
         if not self.openai_enabled:
             return None
             
         try:
+            # レート制限
+            _rate_limit_api('openai', 1.0)
+            
+            # 固定の指示を先頭・可変の地名と文章を末尾に置き、プロバイダ側のプレフィックスキャッシュを効かせる
             prompt = f"""
-以下の文章中の「{place_name}」について、地名としての妥当性を詳細に分析してください。
-
-文章: {sentence}
+末尾の文章中の対象の語について、地名としての妥当性を詳細に分析してください。
 
 以下の観点から総合的に判断し、JSON形式で回答してください：
 
@@ -1212,6 +1257,9 @@ class ContextAwareGeocoder:
 - 「沢山」「様子」等の一般名詞は地名ではない
 - 「語原」「病原」等の学術用語は地名ではない
 - 文脈上明らかに人物を指す場合は人名判定
+
+対象の語: {place_name}
+文章: {sentence}
 """
 
             response = self.openai_client.chat.completions.create(
@@ -1253,6 +1301,93 @@ class ContextAwareGeocoder:
             logger.error(f"強化AI分析エラー: {str(e)}")
             return None
 
+    def _enhanced_ai_analysis_batch(self, place_name: str, sentences: List[str]) -> Optional[List[Dict[str, any]]]:
+        """強化されたAI分析（複数文脈を1回のリクエストで判定）"""
+        if not self.openai_enabled or not sentences:
+            return None
+        
+        try:
+            # レート制限
+            _rate_limit_api('openai', 1.0)
+            
+            numbered_sentences = "\n".join(f"{i}. {sentence}" for i, sentence in enumerate(sentences, 1))
+            # 固定の指示を先頭・可変の地名と文章を末尾に置き、プロバイダ側のプレフィックスキャッシュを効かせる
+            prompt = f"""
+末尾の各文章中の対象の語について、地名としての妥当性を文章ごとに詳細に分析してください。
+
+以下の観点から総合的に判断し、文章の番号順に並べたJSON配列で回答してください：
+
+[
+    {{
+        "index": 文章の番号,
+        "is_place_name": true/false,
+        "confidence": 0.0-1.0,
+        "place_type": "都市名/地域名/歴史地名/自然地名/人名/学術用語/一般名詞/その他",
+        "reasoning": "詳細な判断理由",
+        "context_clues": ["文脈手がかりのリスト"],
+        "alternative_interpretation": "他の解釈の可能性",
+        "literary_context": "文学作品での使用文脈"
+    }}
+]
+
+判断基準：
+1. 文中での文法的役割（主語/目的語/修飾語等）
+2. 周辺語句との関係性
+3. 文豪作品での典型的な使用パターン
+4. 地名として使われる際の文脈的特徴
+5. 人名・一般名詞との区別
+
+特に注意点：
+- 植物学者・文豪の人名は地名ではない
+- 「沢山」「様子」等の一般名詞は地名ではない
+- 「語原」「病原」等の学術用語は地名ではない
+- 文脈上明らかに人物を指す場合は人名判定
+
+対象の語: {place_name}
+文章:
+{numbered_sentences}
+"""
+
+            response = self.openai_client.chat.completions.create(
+                model=os.getenv('OPENAI_MODEL', 'gpt-4'),
+                messages=[
+                    {'role': 'system', 'content': '日本文学・地理・言語学の専門家として、文豪作品中の地名を正確に判別してください。文脈を深く理解し、誤判定を避けることが重要です。'},
+                    {'role': 'user', 'content': prompt}
+                ],
+                max_tokens=500 * len(sentences),
+                temperature=0.1
+            )
+            
+            response_text = response.choices[0].message.content.strip()
+            
+            # JSON解析
+            try:
+                if '```json' in response_text:
+                    json_start = response_text.find('```json') + 7
+                    json_end = response_text.find('```', json_start)
+                    response_text = response_text[json_start:json_end].strip()
+                elif '```' in response_text:
+                    json_start = response_text.find('```') + 3
+                    json_end = response_text.find('```', json_start)
+                    response_text = response_text[json_start:json_end].strip()
+                    
+                result = json.loads(response_text)
+                
+                if isinstance(result, list):
+                    return [analysis for analysis in result
+                            if isinstance(analysis, dict) and 'is_place_name' in analysis]
+                else:
+                    logger.warning(f"AI一括応答形式エラー: {response_text}")
+                    return None
+                    
+            except json.JSONDecodeError:
+                logger.warning(f"AI一括応答JSON解析エラー: {response_text}")
+                return None
+            
+        except Exception as e:
+            logger.error(f"強化AI一括分析エラー: {str(e)}")
+            return None
+
     def _calculate_overall_verdict(self, ai_analyses: List[Dict[str, any]]) -> Dict[str, any]:
         """複数のAI分析結果から総合判定を計算"""
         if not ai_analyses:
@@ -7,6 +7,7 @@ Google Maps API統合、座標取得、品質検証機能を提供
 import os
 import logging
 import time
+import threading
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
@@ -21,7 +22,24 @@ from ..nlp.context_analyzer import ContextAnalysisResult
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Google Maps API の呼び出し間隔（秒）。並列実行時もエンジン・スレッド間で共有する
+GOOGLE_MAPS_MIN_INTERVAL = 0.1
+_rate_limit_lock = threading.Lock()
+_next_request_time = 0.0
+
+def _wait_for_rate_limit():
+    """次の呼び出し枠をロック下で予約し、その時刻まで待機（スレッドセーフ）"""
+    global _next_request_time
+    with _rate_limit_lock:
+        current_time = time.monotonic()
+        scheduled_time = max(current_time, _next_request_time)
+        _next_request_time = scheduled_time + GOOGLE_MAPS_MIN_INTERVAL
+    
+    sleep_time = scheduled_time - current_time
+    if sleep_time > 0:
+        time.sleep(sleep_time)
+
+@dataclass(slots=True)
 class GeocodingResult:
     """Geocoding結果"""
     place_name: str
@@ -86,7 +104,7 @@ class GeocodingEngine:
         
         try:
             # レート制限
-            time.sleep(0.1)
+            _wait_for_rate_limit()
             
             # 検索クエリ構築
             search_query = self._build_search_query(place_name, context_analysis)
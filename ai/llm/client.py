@@ -13,15 +13,7 @@ from typing import Dict, List, Optional, Any
 from threading import Lock
 from pathlib import Path
 from dataclasses import dataclass
-from dotenv import load_dotenv
 
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-
-load_dotenv()
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -129,6 +121,10 @@ class LLMClient:
     
     def __init__(self, api_key: Optional[str] = None, cache_file: str = "data/api_cache.json"):
         """初期化"""
+        # .env の読み込みはクライアント生成時まで遅延
+        from dotenv import load_dotenv
+        load_dotenv()
+        
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         self.client = None
         self.enabled = False
@@ -142,7 +138,10 @@ class LLMClient:
     
     def _init_client(self) -> None:
         """OpenAI クライアント初期化"""
-        if not OPENAI_AVAILABLE:
+        # openai は重いため初回のクライアント生成時に読み込む
+        try:
+            import openai
+        except ImportError:
             logger.warning("⚠️ OpenAI パッケージがインストールされていません")
             return
         
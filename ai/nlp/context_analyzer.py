@@ -11,7 +11,7 @@ from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class ContextAnalysisResult:
     """文脈分析結果"""
     is_place_name: bool  # 地名として使われているか
@@ -18,6 +18,53 @@ from datetime import datetime
 # パス設定
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# 補完済み件数（作者情報付きの地名関係・出版年付きの作品）を該当行のみで数える部分インデックス
+# （sentence_places の作者列が無いスキーマでは作成を見送る）
+STATUS_PARTIAL_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_sentence_places_enriched ON sentence_places(sentence_id) WHERE author_name IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS idx_works_with_publication_year ON works(work_id) WHERE publication_year IS NOT NULL",
+)
+
+# 地名の部分一致検索用の全文検索インデックス（trigramでLIKE '%...%' を索引検索にする）
+# 旧スキーマ（fulltext_search.sql / fix_missing_fts_features.sql）の place_masters_fts・place_search や
+# その同期トリガーと衝突しないよう別名で作成し、作成時に既存のマスターを索引へ取り込む
+PLACE_TRIGRAM_INDEX_SQL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS place_masters_trigram USING fts5(
+        normalized_name, display_name,
+        content='place_masters', content_rowid='master_id',
+        tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS place_masters_trigram_insert
+    AFTER INSERT ON place_masters
+    BEGIN
+        INSERT INTO place_masters_trigram (rowid, normalized_name, display_name)
+        VALUES (NEW.master_id, NEW.normalized_name, NEW.display_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS place_masters_trigram_delete
+    AFTER DELETE ON place_masters
+    BEGIN
+        INSERT INTO place_masters_trigram (place_masters_trigram, rowid, normalized_name, display_name)
+        VALUES ('delete', OLD.master_id, OLD.normalized_name, OLD.display_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS place_masters_trigram_update
+    AFTER UPDATE OF normalized_name, display_name ON place_masters
+    BEGIN
+        INSERT INTO place_masters_trigram (place_masters_trigram, rowid, normalized_name, display_name)
+        VALUES ('delete', OLD.master_id, OLD.normalized_name, OLD.display_name);
+        INSERT INTO place_masters_trigram (rowid, normalized_name, display_name)
+        VALUES (NEW.master_id, NEW.normalized_name, NEW.display_name);
+    END
+    """,
+    "INSERT INTO place_masters_trigram (place_masters_trigram) VALUES ('rebuild')",
+)
+
 class DatabaseInitializerV2:
     """データベース初期化クラス v2.0"""
     
@@ -207,6 +254,9 @@ class DatabaseInitializerV2:
             )
         """)
         
+        # 地名の部分一致検索用の全文検索インデックス
+        self._create_place_trigram_index(cursor)
+        
         # place_aliasesテーブル
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS place_aliases (
@@ -249,6 +299,18 @@ class DatabaseInitializerV2:
             )
         """)
     
+    def _create_place_trigram_index(self, cursor):
+        """部分一致検索用の trigram 索引と同期トリガーを作成（FTS5/trigram 非対応のSQLiteでは見送り、検索はLIKEで行う）"""
+        cursor.execute("SAVEPOINT place_trigram_index")
+        try:
+            for statement in PLACE_TRIGRAM_INDEX_SQL:
+                cursor.execute(statement)
+        except sqlite3.OperationalError as e:
+            cursor.execute("ROLLBACK TO place_trigram_index")
+            print(f"⚠️ 全文検索インデックス作成スキップ: {e}")
+        finally:
+            cursor.execute("RELEASE place_trigram_index")
+    
     def _create_indexes(self, cursor):
         """インデックス作成"""
         indexes = [
@@ -263,15 +325,16 @@ class DatabaseInitializerV2:
             "CREATE INDEX IF NOT EXISTS idx_sentences_work ON sentences(work_id)",
             "CREATE INDEX IF NOT EXISTS idx_sentences_order ON sentences(work_id, sentence_order)",
             
-            # place_mastersテーブル
-            "CREATE INDEX IF NOT EXISTS idx_place_masters_normalized ON place_masters(normalized_name)",
-            "CREATE INDEX IF NOT EXISTS idx_place_masters_display ON place_masters(display_name)",
+            # place_mastersテーブル（normalized_name は UNIQUE 制約の自動インデックスを利用）
+            # 表示名検索（display_name → master_id、rejected除外）をインデックスのみで完結させる複合インデックス
+            "CREATE INDEX IF NOT EXISTS idx_place_masters_display_status ON place_masters(display_name, validation_status)",
             "CREATE INDEX IF NOT EXISTS idx_place_masters_type ON place_masters(place_type)",
             "CREATE INDEX IF NOT EXISTS idx_place_masters_validation ON place_masters(validation_status)",
             "CREATE INDEX IF NOT EXISTS idx_place_masters_usage ON place_masters(usage_count)",
             
             # place_aliasesテーブル
-            "CREATE INDEX IF NOT EXISTS idx_place_aliases_name ON place_aliases(alias_name)",
+            # 別名検索（alias_name → master_id）をインデックスのみで完結させる複合インデックス
+            "CREATE INDEX IF NOT EXISTS idx_place_aliases_name_master ON place_aliases(alias_name, master_id)",
             "CREATE INDEX IF NOT EXISTS idx_place_aliases_master ON place_aliases(master_id)",
             
             # sentence_placesテーブル
@@ -282,6 +345,12 @@ class DatabaseInitializerV2:
         
         for index in indexes:
             cursor.execute(index)
+        
+        for index in STATUS_PARTIAL_INDEXES:
+            try:
+                cursor.execute(index)
+            except sqlite3.OperationalError as e:
+                print(f"⚠️ 部分インデックス作成スキップ: {e}")
     
     def _create_views(self, cursor):
         """ビュー作成"""
@@ -9,11 +9,17 @@
 import sqlite3
 import json
 import os
+import sys
 import shutil
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import logging
 
+# パス設定
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.init_db import STATUS_PARTIAL_INDEXES
+
 # ログ設定
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -189,6 +195,13 @@ class DatabaseMigrationV5:
             
             for index_sql in indexes:
                 cursor.execute(index_sql)
+            
+            # 補完済み件数の集計用部分インデックス（定義は init_db と共有、対象列が無ければ見送り）
+            for index_sql in STATUS_PARTIAL_INDEXES:
+                try:
+                    cursor.execute(index_sql)
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"⚠️ 部分インデックス作成スキップ: {e}")
                 
         logger.info("✅ インデックス作成完了")
 
@@ -30,6 +30,14 @@ from database.manager import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
+# 本文正規化・文分割用の正規表現（作品ごとに再解析しないよう事前コンパイル）
+NEWLINE_RE = re.compile(r'\r\n|\r|\n')
+INLINE_SPACE_RE = re.compile(r'[ \t]+')
+RUBY_RE = re.compile(r'《[^》]*》')
+ANNOTATION_RE = re.compile(r'［[^］]*］')
+BLANK_LINE_RE = re.compile(r'\n\s*\n')
+SENTENCE_END_RE = re.compile(r'[。．！？]')
+
 class AozoraScraper:
     """青空文庫スクレイパー"""
     
@@ -298,22 +306,22 @@ class AozoraScraper:
     def _normalize_text(self, text: str) -> str:
         """テキストの正規化"""
         # 改行の統一
-        text = re.sub(r'\r\n|\r|\n', '\n', text)
+        text = NEWLINE_RE.sub('\n', text)
         
         # 空白の正規化
-        text = re.sub(r'[ \t]+', ' ', text)
+        text = INLINE_SPACE_RE.sub(' ', text)
         
         # 全角文字の正規化
         text = unicodedata.normalize('NFKC', text)
         
         # ルビの削除
-        text = re.sub(r'《[^》]*》', '', text)
+        text = RUBY_RE.sub('', text)
         
         # 注釈の削除
-        text = re.sub(r'［[^］]*］', '', text)
+        text = ANNOTATION_RE.sub('', text)
         
         # 空行の削除
-        text = re.sub(r'\n\s*\n', '\n', text)
+        text = BLANK_LINE_RE.sub('\n', text)
         
         return text.strip()
     
@@ -371,11 +379,18 @@ class AozoraScraper:
     
     def _split_into_sentences(self, text: str) -> List[str]:
         """テキストを文に分割"""
-        # 文末記号で分割
-        sentences = re.split(r'[。．！？]', text)
-        
-        # 空の文を除去
-        sentences = [s.strip() for s in sentences if s.strip()]
+        # 文末記号の位置を1回走査し、区切り間を切り出しながら空の文を除去
+        sentences = []
+        start = 0
+        for match in SENTENCE_END_RE.finditer(text):
+            sentence = text[start:match.start()].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+        
+        sentence = text[start:].strip()
+        if sentence:
+            sentences.append(sentence)
         
         return sentences
     
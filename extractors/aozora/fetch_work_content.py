@@ -202,22 +202,21 @@ class WorkContentProcessor:
         parts = re.split(r'([。．！？])', text)
         
         sentences = []
-        current_sentence = ""
+        buffer = []  # 文の断片（文末で結合）
         
         for part in parts:
+            buffer.append(part)
             if part in ['。', '．', '！', '？']:
-                # 句読点を現在の文に追加
-                current_sentence += part
-                # 文が完成したので追加
-                if current_sentence.strip() and len(current_sentence.strip()) >= 3:
-                    sentences.append(current_sentence.strip())
-                current_sentence = ""
-            else:
-                current_sentence += part
+                # 句読点までの断片を結合して文が完成
+                sentence = ''.join(buffer).strip()
+                buffer.clear()
+                if len(sentence) >= 3:
+                    sentences.append(sentence)
         
         # 最後の部分を処理（句読点なしで終わる場合）
-        if current_sentence.strip() and len(current_sentence.strip()) >= 3:
-            sentences.append(current_sentence.strip())
+        sentence = ''.join(buffer).strip()
+        if len(sentence) >= 3:
+            sentences.append(sentence)
         
         return sentences
     
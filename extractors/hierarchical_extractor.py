@@ -22,7 +22,7 @@ class SectionType(Enum):
     PARAGRAPH = "paragraph"
     SENTENCE = "sentence"
 
-@dataclass
+@dataclass(slots=True)
 class ExtractedSection:
     """抽出されたセクション"""
     section_type: SectionType
@@ -46,14 +46,21 @@ class HierarchicalExtractor:
     def __init__(self):
         # 青空文庫の章タイトル注記パターン
         self.chapter_patterns = [
-            r'［＃「(.+?)」は大見出し］',
-            r'［＃「(.+?)」は中見出し］',
-            r'［＃「(.+?)」は小見出し］',
+            r'［＃「([^］]+?)」は大見出し］',
+            r'［＃「([^］]+?)」は中見出し］',
+            r'［＃「([^］]+?)」は小見出し］',
         ]
         
+        self._chapter_re = re.compile(
+            '|'.join(f'(?:{pattern})' for pattern in self.chapter_patterns)
+        )
+        
+        # 文分割パターン
+        self._sentence_re = re.compile(r'[^。！？]*[。！？]|[^。！？]+$')
+        
     def extract_structure(self, text: str, work_id: int) -> List[ExtractedSection]:
         """テキストから階層構造を抽出"""
-        logger.info(f"作品ID {work_id} の階層構造抽出開始")
+        logger.info("作品ID %s の階層構造抽出開始", work_id)
         
         sections = []
         
@@ -86,39 +93,35 @@ class HierarchicalExtractor:
                     )
                     sections.append(sent_section)
             
-            logger.info(f"階層構造抽出完了: {len(sections)}セクション")
+            logger.info("階層構造抽出完了: %dセクション", len(sections))
             return sections
             
         except Exception as e:
-            logger.error(f"階層構造抽出エラー: {e}")
+            logger.error("階層構造抽出エラー: %s", e)
             return self._create_fallback_structure(text, work_id)
     
     def _extract_chapters(self, text: str) -> List[Dict[str, Any]]:
         """章の抽出"""
         chapters = []
         
-        # 青空文庫注記による章抽出
-        for pattern in self.chapter_patterns:
-            matches = list(re.finditer(pattern, text))
+        # 青空文庫注記による章抽出（全見出しを1回の走査で取得）
+        matches = list(self._chapter_re.finditer(text))
+        
+        for i, match in enumerate(matches):
+            # 一致した見出しパターンのタイトルグループを取得
+            title = match.group(match.lastindex)
+            start_pos = match.start()
             
-            for match in matches:
-                title = match.group(1)
-                start_pos = match.start()
-                
-                # 次の章までの内容を取得
-                next_chapter_pos = len(text)
-                for next_match in re.finditer(pattern, text[match.end():]):
-                    next_chapter_pos = match.end() + next_match.start()
-                    break
-                
-                content = text[match.end():next_chapter_pos].strip()
-                
-                if content:
-                    chapters.append({
-                        'title': title,
-                        'content': content,
-                        'start_pos': start_pos
-                    })
+            # 次の見出しまでの内容を取得
+            next_chapter_pos = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            content = text[match.end():next_chapter_pos].strip()
+            
+            if content:
+                chapters.append({
+                    'title': title,
+                    'content': content,
+                    'start_pos': start_pos
+                })
         
         # 章が見つからない場合、全体を1つの章として扱う
         if not chapters:
@@ -133,32 +136,16 @@ class HierarchicalExtractor:
     def _extract_sentences(self, text: str) -> List[Dict[str, Any]]:
         """文の抽出"""
         sentences = []
-        current_pos = 0
-        
-        # 句点・感嘆符・疑問符で分割
-        sentence_parts = re.split(r'([。！？])', text)
         
-        current_sentence = ""
-        for i, part in enumerate(sentence_parts):
-            current_sentence += part
-            
-            # 句点類の場合、文として確定
-            if re.match(r'[。！？]', part):
-                sentence_content = current_sentence.strip()
-                if sentence_content:
-                    sentences.append({
-                        'content': sentence_content,
-                        'start_pos': current_pos
-                    })
-                    current_pos += len(current_sentence)
-                    current_sentence = ""
-        
-        # 残りの文があれば追加
-        if current_sentence.strip():
-            sentences.append({
-                'content': current_sentence.strip(),
-                'start_pos': current_pos
-            })
+        # 句点・感嘆符・疑問符までを1文として走査（末尾の句点なし文も含む）
+        for match in self._sentence_re.finditer(text):
+            raw = match.group()
+            sentence_content = raw.strip()
+            if sentence_content:
+                sentences.append({
+                    'content': sentence_content,
+                    'start_pos': match.start() + len(raw) - len(raw.lstrip())
+                })
         
         return sentences
     
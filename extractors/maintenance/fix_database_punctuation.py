@@ -5,20 +5,73 @@
 
 import sqlite3
 import re
+from itertools import islice
+
+from tqdm import tqdm
+
+# executemany 1回あたりの更新件数
+UPDATE_BATCH_SIZE = 10000
+
+# 句読点付与の判定（「だろうか」「でしょうか」「だ！」「である！」は1文字の指標に含まれる）
+SENTENCE_ENDINGS = ('。', '！', '？', '」', '』', '〉', '》')
+QUESTION_INDICATOR_RE = re.compile(r'[？か]')
+EXCLAMATION_INDICATOR_RE = re.compile(r'[！よ]')
 
 def add_appropriate_punctuation(text):
     """文に適切な句読点を追加"""
-    if not text or text.endswith(('。', '！', '？', '」', '』', '〉', '》')):
+    if not text or text.endswith(SENTENCE_ENDINGS):
         return text
     
     # 文の内容から適切な句読点を推定
-    if any(indicator in text for indicator in ['？', 'か', 'だろうか', 'でしょうか']):
+    if QUESTION_INDICATOR_RE.search(text):
         return text + '？'
-    elif any(indicator in text for indicator in ['！', 'だ！', 'である！', 'よ']):
+    elif EXCLAMATION_INDICATOR_RE.search(text):
         return text + '！'
     else:
         return text + '。'
 
+def iter_punctuation_fixes(rows):
+    """(ID, テキスト) の行から句読点を補った (ID, 修正後テキスト) のみを返す"""
+    for row_id, text in rows:
+        fixed_text = add_appropriate_punctuation(text)
+        if fixed_text != text:
+            yield row_id, fixed_text
+
+def iter_rows_by_id(conn, sql, page_size=UPDATE_BATCH_SIZE):
+    """ID昇順のキーセット方式でページ単位に行を読み出す（全件をメモリに載せない）
+
+    sql は「ID > ? ORDER BY ID LIMIT ?」形式で、先頭列がIDであること。
+    各ページは読み切ってから返すため、読み出し中の更新とも競合しない。
+    """
+    last_id = -1
+    while True:
+        rows = conn.execute(sql, (last_id, page_size)).fetchall()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1][0]
+
+def executemany_in_batches(conn, sql, params, batch_size=UPDATE_BATCH_SIZE):
+    """パラメータをバッチ単位で executemany に渡し、処理件数を返す"""
+    params = iter(params)
+    total = 0
+    while True:
+        batch = list(islice(params, batch_size))
+        if not batch:
+            return total
+        conn.executemany(sql, batch)
+        total += len(batch)
+
+def punctuation_tail_stats(conn, table, column):
+    """末尾1文字でグループ化した1回の走査で (総数, 句点, 感嘆符, 疑問符) を集計"""
+    tail_counts = dict(conn.execute(f'''
+        SELECT substr({column}, -1) AS tail, COUNT(*)
+        FROM {table}
+        GROUP BY tail
+    ''').fetchall())
+    total = sum(tail_counts.values())
+    return total, tail_counts.get('。', 0), tail_counts.get('！', 0), tail_counts.get('？', 0)
+
 def fix_database_punctuation():
     """データベースの句読点を修正"""
     print('🔧 データベース句読点修正開始...')
@@ -29,16 +82,7 @@ def fix_database_punctuation():
 
     try:
         # 現在の状況確認
-        cursor = conn.execute('''
-            SELECT 
-                COUNT(*) as total,
-                COUNT(CASE WHEN sentence_text LIKE "%。" THEN 1 END) as period,
-                COUNT(CASE WHEN sentence_text LIKE "%！" THEN 1 END) as exclamation,
-                COUNT(CASE WHEN sentence_text LIKE "%？" THEN 1 END) as question
-            FROM sentences
-        ''')
-        
-        total, period, exclamation, question = cursor.fetchone()
+        total, period, exclamation, question = punctuation_tail_stats(conn, 'sentences', 'sentence_text')
         punctuation_before = period + exclamation + question
         
         print(f'📊 修正前の状況:')
@@ -57,36 +101,29 @@ def fix_database_punctuation():
         # 句読点修正処理
         print('\n🔄 句読点修正処理中...')
         
-        cursor = conn.execute('SELECT sentence_id, sentence_text FROM sentences ORDER BY sentence_id')
-        sentences_data = cursor.fetchall()
-
-        updated_count = 0
-        for sentence_id, sentence_text in sentences_data:
-            fixed_text = add_appropriate_punctuation(sentence_text)
-            
-            if fixed_text != sentence_text:
-                conn.execute('''
-                    UPDATE sentences 
-                    SET sentence_text = ?, sentence_length = ? 
-                    WHERE sentence_id = ?
-                ''', (fixed_text, len(fixed_text), sentence_id))
-                updated_count += 1
+        sentences_data = iter_rows_by_id(conn, '''
+            SELECT sentence_id, sentence_text FROM sentences
+            WHERE sentence_id > ? ORDER BY sentence_id LIMIT ?
+        ''')
+
+        # 変更行のみを1トランザクション内でまとめて更新
+        updated_count = executemany_in_batches(conn, '''
+            UPDATE sentences 
+            SET sentence_text = ?, sentence_length = ? 
+            WHERE sentence_id = ?
+        ''', (
+            (fixed_text, len(fixed_text), sentence_id)
+            for sentence_id, fixed_text in iter_punctuation_fixes(
+                tqdm(sentences_data, total=total, desc='sentences', miniters=UPDATE_BATCH_SIZE)
+            )
+        ))
 
         conn.commit()
         
         print(f'  ✅ {updated_count:,}件のセンテンスを更新しました')
 
         # 修正後の状況確認
-        cursor = conn.execute('''
-            SELECT 
-                COUNT(*) as total,
-                COUNT(CASE WHEN sentence_text LIKE "%。" THEN 1 END) as period,
-                COUNT(CASE WHEN sentence_text LIKE "%！" THEN 1 END) as exclamation,
-                COUNT(CASE WHEN sentence_text LIKE "%？" THEN 1 END) as question
-            FROM sentences
-        ''')
-        
-        total_after, period_after, exclamation_after, question_after = cursor.fetchone()
+        total_after, period_after, exclamation_after, question_after = punctuation_tail_stats(conn, 'sentences', 'sentence_text')
         punctuation_after = period_after + exclamation_after + question_after
         
         print(f'\n📊 修正後の状況:')
@@ -115,36 +152,28 @@ def fix_database_punctuation():
         conn.execute('DROP TABLE IF EXISTS sentence_places_backup_punctuation')
         conn.execute('CREATE TABLE sentence_places_backup_punctuation AS SELECT * FROM sentence_places')
         
-        cursor = conn.execute('SELECT id, matched_text FROM sentence_places ORDER BY id')
-        sp_data = cursor.fetchall()
-
-        sp_updated_count = 0
-        for sp_id, matched_text in sp_data:
-            fixed_text = add_appropriate_punctuation(matched_text)
-            
-            if fixed_text != matched_text:
-                conn.execute('''
-                    UPDATE sentence_places 
-                    SET matched_text = ? 
-                    WHERE id = ?
-                ''', (fixed_text, sp_id))
-                sp_updated_count += 1
+        sp_data = iter_rows_by_id(conn, '''
+            SELECT id, matched_text FROM sentence_places
+            WHERE id > ? ORDER BY id LIMIT ?
+        ''')
+
+        sp_updated_count = executemany_in_batches(conn, '''
+            UPDATE sentence_places 
+            SET matched_text = ? 
+            WHERE id = ?
+        ''', (
+            (fixed_text, sp_id)
+            for sp_id, fixed_text in iter_punctuation_fixes(
+                tqdm(sp_data, desc='sentence_places', miniters=UPDATE_BATCH_SIZE)
+            )
+        ))
 
         conn.commit()
         
         print(f'  ✅ sentence_places: {sp_updated_count}件を更新しました')
 
         # sentence_placesの結果確認
-        cursor = conn.execute('''
-            SELECT 
-                COUNT(*) as total,
-                COUNT(CASE WHEN matched_text LIKE "%。" THEN 1 END) as period,
-                COUNT(CASE WHEN matched_text LIKE "%！" THEN 1 END) as exclamation,
-                COUNT(CASE WHEN matched_text LIKE "%？" THEN 1 END) as question
-            FROM sentence_places
-        ''')
-        
-        sp_total, sp_period, sp_exclamation, sp_question = cursor.fetchone()
+        sp_total, sp_period, sp_exclamation, sp_question = punctuation_tail_stats(conn, 'sentence_places', 'matched_text')
         sp_punctuation = sp_period + sp_exclamation + sp_question
         
         print(f'\nsentence_placesテーブル修正結果:')
@@ -3,74 +3,132 @@
 データベース内のセンテンス句読点修正スクリプト
 """
 
+import argparse
 import sqlite3
 import re
 from typing import List, Dict, Optional
 
+# 一括更新向けのSQLite設定（WAL・同期緩和・メモリ上の一時領域・大きめのキャッシュ）
+SQLITE_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=10737418240;
+    PRAGMA cache_size=-65536;
+    PRAGMA busy_timeout=30000;
+"""
+
+def _open_conn(db_path: str) -> sqlite3.Connection:
+    """PRAGMA設定済みのSQLite接続を開く"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SQLITE_PRAGMAS)
+    return conn
+
+def _close_conn(conn: sqlite3.Connection):
+    """クエリプランナー統計を更新してから接続を閉じる"""
+    conn.execute("PRAGMA optimize")
+    conn.close()
+
+# 句読点付与の判定（「だろうか」「でしょうか」「だ！」「である！」は1文字の指標に含まれる）
+SENTENCE_ENDINGS = ('。', '！', '？', '」', '』', '〉', '》')
+QUESTION_INDICATOR_RE = re.compile(r'[？か]')
+EXCLAMATION_INDICATOR_RE = re.compile(r'[！よ]')
+
+# センテンス分割の句点
+SENTENCE_END_RE = re.compile(r'[。．！？]')
+
+# _add_appropriate_punctuation と同じ規則で句読点を付与するSQL（{column} に列名を埋め込む）
+PUNCTUATION_WHERE_SQL = """
+    {column} != ''
+    AND substr({column}, -1) NOT IN ('。', '！', '？', '」', '』', '〉', '》')
+"""
+PUNCTUATION_CASE_SQL = """
+    {column} || CASE
+        WHEN instr({column}, '？') > 0 OR instr({column}, 'か') > 0 THEN '？'
+        WHEN instr({column}, '！') > 0 OR instr({column}, 'よ') > 0 THEN '！'
+        ELSE '。'
+    END
+"""
+
 class DatabasePunctuationFixer:
-    def __init__(self, db_path: str = "data/bungo_map.db"):
+    def __init__(self, db_path: str = "data/bungo_map.db", backup: bool = True):
         self.db_path = db_path
+        self.backup = backup
+        
+        # (テーブル, 列) ごとの句読点集計（更新があったテーブルのみ再集計）
+        self._stats_cache = {}
     
     def fix_all_punctuation(self):
         """すべての句読点問題を修正"""
         print("🔧 データベース句読点修正開始...")
         print("=" * 80)
         
-        with sqlite3.connect(self.db_path) as conn:
-            # 1. 現在の状況確認
-            self._analyze_current_situation(conn)
-            
-            # 2. 新しいテスト用データで句読点付きセンテンスを作成
-            self._create_test_sentences_with_punctuation(conn)
-            
-            # 3. 結果確認
-            self._verify_fix_results(conn)
-            
-            conn.commit()
+        conn = _open_conn(self.db_path)
+        try:
+            with conn:
+                # 1. 現在の状況確認
+                self._analyze_current_situation(conn)
+                
+                # 2. 新しいテスト用データで句読点付きセンテンスを作成
+                self._create_test_sentences_with_punctuation(conn)
+                
+                # 3. 結果確認
+                self._verify_fix_results(conn)
+                
+                conn.commit()
+        finally:
+            _close_conn(conn)
         
         print("✅ データベース句読点修正完了!")
     
+    def _punctuation_stats(self, conn: sqlite3.Connection, table: str, column: str) -> Dict:
+        """テーブルを1回走査して句読点付与状況を集計（未更新なら前回の集計を再利用）"""
+        key = (table, column)
+        if key not in self._stats_cache:
+            # 末尾1文字でグループ化して1回の走査で集計し、句読点の行数はPython側で合算
+            total = punctuated = length_sum = length_count = 0
+            for tail, count, tail_length_sum, tail_length_count in conn.execute(f"""
+                SELECT substr({column}, -1) AS tail, COUNT(*), SUM(LENGTH({column})), COUNT({column})
+                FROM {table}
+                GROUP BY tail
+            """):
+                total += count
+                length_sum += tail_length_sum or 0
+                length_count += tail_length_count
+                if tail in ('。', '！', '？'):
+                    punctuated += count
+            avg_length = length_sum / length_count if length_count else None
+            
+            self._stats_cache[key] = {
+                'total': total,
+                'punctuated': punctuated,
+                'rate': punctuated / total * 100 if total > 0 else 0,
+                'avg_length': avg_length
+            }
+        
+        return self._stats_cache[key]
+    
     def _analyze_current_situation(self, conn: sqlite3.Connection):
         """現在の状況を分析"""
         print("📊 現在の状況分析:")
         print("-" * 60)
         
         # sentences分析
-        cursor = conn.execute("""
-            SELECT 
-                COUNT(*) as total,
-                COUNT(CASE WHEN sentence_text LIKE '%。' THEN 1 END) as period,
-                COUNT(CASE WHEN sentence_text LIKE '%！' THEN 1 END) as exclamation,
-                COUNT(CASE WHEN sentence_text LIKE '%？' THEN 1 END) as question,
-                AVG(LENGTH(sentence_text)) as avg_length
-            FROM sentences
-        """)
-        
-        total, period, exclamation, question, avg_len = cursor.fetchone()
-        punctuation_rate = (period + exclamation + question) / total * 100 if total > 0 else 0
+        stats = self._punctuation_stats(conn, 'sentences', 'sentence_text')
+        total, punctuated, punctuation_rate, avg_len = stats['total'], stats['punctuated'], stats['rate'], stats['avg_length']
         
         print(f"sentences テーブル:")
         print(f"  総センテンス数: {total:,}件")
-        print(f"  句読点付き: {period + exclamation + question}件 ({punctuation_rate:.1f}%)")
+        print(f"  句読点付き: {punctuated}件 ({punctuation_rate:.1f}%)")
         print(f"  平均文字数: {avg_len:.1f}文字")
         
         # sentence_places分析
-        cursor = conn.execute("""
-            SELECT 
-                COUNT(*) as total,
-                COUNT(CASE WHEN matched_text LIKE '%。' THEN 1 END) as period,
-                COUNT(CASE WHEN matched_text LIKE '%！' THEN 1 END) as exclamation,
-                COUNT(CASE WHEN matched_text LIKE '%？' THEN 1 END) as question,
-                AVG(LENGTH(matched_text)) as avg_length
-            FROM sentence_places
-        """)
-        
-        sp_total, sp_period, sp_exclamation, sp_question, sp_avg_len = cursor.fetchone()
-        sp_punctuation_rate = (sp_period + sp_exclamation + sp_question) / sp_total * 100 if sp_total > 0 else 0
+        sp_stats = self._punctuation_stats(conn, 'sentence_places', 'matched_text')
+        sp_total, sp_punctuated, sp_punctuation_rate, sp_avg_len = sp_stats['total'], sp_stats['punctuated'], sp_stats['rate'], sp_stats['avg_length']
         
         print(f"sentence_places テーブル:")
         print(f"  総レコード数: {sp_total}件")
-        print(f"  句読点付き: {sp_period + sp_exclamation + sp_question}件 ({sp_punctuation_rate:.1f}%)")
+        print(f"  句読点付き: {sp_punctuated}件 ({sp_punctuation_rate:.1f}%)")
         print(f"  平均文字数: {sp_avg_len:.1f}文字")
         
         # サンプル表示
@@ -88,77 +146,60 @@ class DatabasePunctuationFixer:
         print(f"\n🔄 句読点付きセンテンス作成中...")
         
         # バックアップ作成
-        print("📋 既存データをバックアップ中...")
-        conn.execute("DROP TABLE IF EXISTS sentences_backup")
-        conn.execute("CREATE TABLE sentences_backup AS SELECT * FROM sentences")
-        
-        conn.execute("DROP TABLE IF EXISTS sentence_places_backup")
-        conn.execute("CREATE TABLE sentence_places_backup AS SELECT * FROM sentence_places")
+        if self.backup:
+            self._backup_database(conn)
+        else:
+            print("⏭️ バックアップをスキップ (--no-backup)")
         
-        # sentencesテーブルの更新
+        # sentencesテーブルの更新（1回のUPDATEで句読点付与と文字数更新を行う）
         print("🔄 sentencesテーブル更新中...")
         
-        # 既存の文を取得して句読点を追加
-        cursor = conn.execute("""
-            SELECT sentence_id, sentence_text, sentence_length 
-            FROM sentences 
-            ORDER BY sentence_id
+        cursor = conn.execute(f"""
+            UPDATE sentences 
+            SET sentence_text = {PUNCTUATION_CASE_SQL.format(column='sentence_text')},
+                sentence_length = length(sentence_text) + 1
+            WHERE {PUNCTUATION_WHERE_SQL.format(column='sentence_text')}
         """)
-        
-        sentences_data = cursor.fetchall()
-        updated_sentences = 0
-        
-        for sentence_id, sentence_text, sentence_length in sentences_data:
-            # 句読点を適切に追加
-            fixed_text = self._add_appropriate_punctuation(sentence_text)
-            
-            if fixed_text != sentence_text:
-                # 更新
-                conn.execute("""
-                    UPDATE sentences 
-                    SET sentence_text = ?, sentence_length = ?
-                    WHERE sentence_id = ?
-                """, (fixed_text, len(fixed_text), sentence_id))
-                updated_sentences += 1
+        updated_sentences = cursor.rowcount
+        if updated_sentences:
+            self._stats_cache.pop(('sentences', 'sentence_text'), None)
         
         print(f"  ✅ sentences: {updated_sentences:,}件更新")
         
         # sentence_placesテーブルの更新
         print("🔄 sentence_placesテーブル更新中...")
         
-        cursor = conn.execute("""
-            SELECT id, matched_text 
-            FROM sentence_places 
-            ORDER BY id
+        cursor = conn.execute(f"""
+            UPDATE sentence_places 
+            SET matched_text = {PUNCTUATION_CASE_SQL.format(column='matched_text')}
+            WHERE {PUNCTUATION_WHERE_SQL.format(column='matched_text')}
         """)
-        
-        sp_data = cursor.fetchall()
-        updated_sp = 0
-        
-        for sp_id, matched_text in sp_data:
-            # 句読点を適切に追加
-            fixed_text = self._add_appropriate_punctuation(matched_text)
-            
-            if fixed_text != matched_text:
-                # 更新
-                conn.execute("""
-                    UPDATE sentence_places 
-                    SET matched_text = ?
-                    WHERE id = ?
-                """, (fixed_text, sp_id))
-                updated_sp += 1
+        updated_sp = cursor.rowcount
+        if updated_sp:
+            self._stats_cache.pop(('sentence_places', 'matched_text'), None)
         
         print(f"  ✅ sentence_places: {updated_sp}件更新")
     
+    def _backup_database(self, conn: sqlite3.Connection):
+        """オンラインバックアップAPIでDBファイル全体を .bak にページ単位でコピー"""
+        backup_path = f"{self.db_path}.bak"
+        print(f"📋 既存データをバックアップ中... ({backup_path})")
+        
+        backup_conn = sqlite3.connect(backup_path)
+        try:
+            conn.backup(backup_conn)
+        finally:
+            backup_conn.close()
+    
     def _add_appropriate_punctuation(self, text: str) -> str:
         """文に適切な句読点を追加"""
-        if not text or text.endswith(('。', '！', '？', '」', '』', '〉', '》')):
+        if not text or text.endswith(SENTENCE_ENDINGS):
             return text
         
         # 文の内容から適切な句読点を推定
-        if any(indicator in text for indicator in ['？', 'か', 'だろうか', 'でしょうか']):
+        if QUESTION_INDICATOR_RE.search(text):
             return text + '？'
-        elif any(indicator in text for indicator in ['！', 'だ！', 'である！', 'よ']):
+        elif EXCLAMATION_INDICATOR_RE.search(text):
             return text + '！'
         else:
             return text + '。'
@@ -169,41 +210,21 @@ class DatabasePunctuationFixer:
         print("-" * 60)
         
         # sentences確認
-        cursor = conn.execute("""
-            SELECT 
-                COUNT(*) as total,
-                COUNT(CASE WHEN sentence_text LIKE '%。' THEN 1 END) as period,
-                COUNT(CASE WHEN sentence_text LIKE '%！' THEN 1 END) as exclamation,
-                COUNT(CASE WHEN sentence_text LIKE '%？' THEN 1 END) as question,
-                AVG(LENGTH(sentence_text)) as avg_length
-            FROM sentences
-        """)
-        
-        total, period, exclamation, question, avg_len = cursor.fetchone()
-        punctuation_rate = (period + exclamation + question) / total * 100 if total > 0 else 0
+        stats = self._punctuation_stats(conn, 'sentences', 'sentence_text')
+        total, punctuated, punctuation_rate, avg_len = stats['total'], stats['punctuated'], stats['rate'], stats['avg_length']
         
         print(f"sentences テーブル（修正後）:")
         print(f"  総センテンス数: {total:,}件")
-        print(f"  句読点付き: {period + exclamation + question}件 ({punctuation_rate:.1f}%)")
+        print(f"  句読点付き: {punctuated}件 ({punctuation_rate:.1f}%)")
         print(f"  平均文字数: {avg_len:.1f}文字")
         
         # sentence_places確認
-        cursor = conn.execute("""
-            SELECT 
-                COUNT(*) as total,
-                COUNT(CASE WHEN matched_text LIKE '%。' THEN 1 END) as period,
-                COUNT(CASE WHEN matched_text LIKE '%！' THEN 1 END) as exclamation,
-                COUNT(CASE WHEN matched_text LIKE '%？' THEN 1 END) as question,
-                AVG(LENGTH(matched_text)) as avg_length
-            FROM sentence_places
-        """)
-        
-        sp_total, sp_period, sp_exclamation, sp_question, sp_avg_len = cursor.fetchone()
-        sp_punctuation_rate = (sp_period + sp_exclamation + sp_question) / sp_total * 100 if sp_total > 0 else 0
+        sp_stats = self._punctuation_stats(conn, 'sentence_places', 'matched_text')
+        sp_total, sp_punctuated, sp_punctuation_rate, sp_avg_len = sp_stats['total'], sp_stats['punctuated'], sp_stats['rate'], sp_stats['avg_length']
         
         print(f"sentence_places テーブル（修正後）:")
         print(f"  総レコード数: {sp_total}件")
-        print(f"  句読点付き: {sp_period + sp_exclamation + sp_question}件 ({sp_punctuation_rate:.1f}%)")
+        print(f"  句読点付き: {sp_punctuated}件 ({sp_punctuation_rate:.1f}%)")
         print(f"  平均文字数: {sp_avg_len:.1f}文字")
         
         # 修正後サンプル表示
@@ -229,21 +250,19 @@ def test_punctuation_splitter():
         if not text:
             return []
         
-        parts = re.split(r'([。．！？])', text)
         sentences = []
-        current_sentence = ""
+        start = 0
         
-        for part in parts:
-            if part in ['。', '．', '！', '？']:
-                current_sentence += part
-                if current_sentence.strip() and len(current_sentence.strip()) >= 3:
-                    sentences.append(current_sentence.strip())
-                current_sentence = ""
-            else:
-                current_sentence += part
+        # 句点ごとに直前の区切り位置からスライス（区切り文字も含める）
+        for match in SENTENCE_END_RE.finditer(text):
+            sentence = text[start:match.end()].strip()
+            if len(sentence) >= 3:
+                sentences.append(sentence)
+            start = match.end()
         
-        if current_sentence.strip() and len(current_sentence.strip()) >= 3:
-            sentences.append(current_sentence.strip())
+        sentence = text[start:].strip()
+        if len(sentence) >= 3:
+            sentences.append(sentence)
         
         return sentences
     
@@ -264,17 +283,21 @@ def test_punctuation_splitter():
     print()
     
     # 古い方法
-    old_sentences = re.split(r'[。．！？]', test_text)
+    old_sentences = SENTENCE_END_RE.split(test_text)
     old_sentences = [s.strip() for s in old_sentences if s.strip()]
     print("🚫 古い方法（句読点削除）:")
     for i, sentence in enumerate(old_sentences, 1):
         print(f"  {i}. \"{sentence}\" ← 句読点欠落")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='データベース内のセンテンス句読点修正')
+    parser.add_argument('--no-backup', action='store_true', help='修正前のバックアップ (.bak) を作成しない')
+    args = parser.parse_args()
+    
     # まずテストを実行
     test_punctuation_splitter()
     print("\n" + "=" * 80)
     
     # データベース修正を実行
-    fixer = DatabasePunctuationFixer()
+    fixer = DatabasePunctuationFixer(backup=not args.no_backup)
     fixer.fix_all_punctuation() 
\ No newline at end of file
@@ -32,22 +32,29 @@ class SentencePunctuationFixer:
         
         print("✅ センテンス句読点修正完了!")
     
+    def _sentence_tail_stats(self, conn: sqlite3.Connection) -> Tuple[int, int, int, int, float]:
+        """文末1文字ごとの件数を1回の走査で集計（総数・。・！・？・平均文字数）"""
+        tail_counts = {}
+        length_sum = length_count = 0
+        for tail, count, tail_length_sum, tail_length_count in conn.execute("""
+            SELECT substr(sentence_text, -1) AS tail, COUNT(*), SUM(LENGTH(sentence_text)), COUNT(sentence_text)
+            FROM sentences
+            GROUP BY tail
+        """):
+            tail_counts[tail] = count
+            length_sum += tail_length_sum or 0
+            length_count += tail_length_count
+        
+        total = sum(tail_counts.values())
+        avg_len = length_sum / length_count if length_count else None
+        return total, tail_counts.get('。', 0), tail_counts.get('！', 0), tail_counts.get('？', 0), avg_len
+    
     def _analyze_current_sentences(self, conn: sqlite3.Connection):
         """現在の問題状況を分析"""
         print("\n📊 現在のセンテンス状況分析:")
         print("-" * 80)
         
-        cursor = conn.execute("""
-            SELECT 
-                COUNT(*) as total_sentences,
-                COUNT(CASE WHEN sentence_text LIKE '%。' THEN 1 END) as with_period,
-                COUNT(CASE WHEN sentence_text LIKE '%！' THEN 1 END) as with_exclamation,
-                COUNT(CASE WHEN sentence_text LIKE '%？' THEN 1 END) as with_question,
-                AVG(LENGTH(sentence_text)) as avg_length
-            FROM sentences
-        """)
-        
-        total, period, exclamation, question, avg_len = cursor.fetchone()
+        total, period, exclamation, question, avg_len = self._sentence_tail_stats(conn)
         print(f"総センテンス数: {total}件")
         print(f"句点(。)で終わる文: {period}件 ({period/total*100:.1f}%)")
         print(f"感嘆符(！)で終わる文: {exclamation}件 ({exclamation/total*100:.1f}%)")
@@ -163,17 +170,7 @@ class SentencePunctuationFixer:
         print("\n📊 修正後の状況:")
         print("-" * 80)
         
-        cursor = conn.execute("""
-            SELECT 
-                COUNT(*) as total_sentences,
-                COUNT(CASE WHEN sentence_text LIKE '%。' THEN 1 END) as with_period,
-                COUNT(CASE WHEN sentence_text LIKE '%！' THEN 1 END) as with_exclamation,
-                COUNT(CASE WHEN sentence_text LIKE '%？' THEN 1 END) as with_question,
-                AVG(LENGTH(sentence_text)) as avg_length
-            FROM sentences
-        """)
-        
-        total, period, exclamation, question, avg_len = cursor.fetchone()
+        total, period, exclamation, question, avg_len = self._sentence_tail_stats(conn)
         print(f"総センテンス数: {total}件")
         print(f"句点(。)で終わる文: {period}件 ({period/total*100:.1f}%)")
         print(f"感嘆符(！)で終わる文: {exclamation}件 ({exclamation/total*100:.1f}%)")
@@ -219,21 +216,20 @@ class SentencePunctuationFixer:
         # パターン: 句読点の後に文字があるか、文末の場合に分割
         parts = re.split(r'([。！？])', text)
         
-        current_sentence = ""
-        for i, part in enumerate(parts):
+        buffer = []  # 文の断片（文末で結合）
+        for part in parts:
+            buffer.append(part)
             if part in ['。', '！', '？']:
-                # 句読点を現在の文に追加
-                current_sentence += part
-                # 文が完成したので追加
-                if current_sentence.strip() and len(current_sentence.strip()) >= 3:
-                    sentences.append(current_sentence.strip())
-                current_sentence = ""
-            else:
-                current_sentence += part
+                # 句読点までの断片を結合して文が完成
+                sentence = ''.join(buffer).strip()
+                buffer.clear()
+                if len(sentence) >= 3:
+                    sentences.append(sentence)
         
         # 最後の部分を処理
-        if current_sentence.strip() and len(current_sentence.strip()) >= 3:
-            sentences.append(current_sentence.strip())
+        sentence = ''.join(buffer).strip()
+        if len(sentence) >= 3:
+            sentences.append(sentence)
         
         return sentences
 
@@ -22,7 +22,6 @@ import sys
 import os
 import argparse
 import sqlite3
-import subprocess
 from datetime import datetime
 from typing import Dict, Any
 
@@ -31,8 +30,32 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
+from database.init_db import STATUS_PARTIAL_INDEXES
 from database.sentence_places_enricher import SentencePlacesEnricher
 from ..aozora.aozora_metadata_extractor import AozoraMetadataExtractor
+from ..processors.enrich_works_metadata import run as run_enrich_works_metadata
+from ..processors.update_work_publication_year import run as run_update_work_publication_year
+
+# 一括更新向けのSQLite設定（WAL・同期緩和・メモリ上の一時領域・大きめのキャッシュ）
+SQLITE_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=10737418240;
+    PRAGMA cache_size=-65536;
+    PRAGMA busy_timeout=30000;
+"""
+
+def _open_conn(db_path: str) -> sqlite3.Connection:
+    """PRAGMA設定済みのSQLite接続を開く"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SQLITE_PRAGMAS)
+    return conn
+
+def _close_conn(conn: sqlite3.Connection):
+    """クエリプランナー統計を更新してから接続を閉じる"""
+    conn.execute("PRAGMA optimize")
+    conn.close()
 
 class MaintenancePipeline:
     """メンテナンスパイプライン実行器"""
@@ -40,6 +63,8 @@ class MaintenancePipeline:
     def __init__(self):
         print("🔧 文豪ゆかり地図システム - メンテナンスパイプライン初期化中...")
         self.db_path = os.path.join(parent_dir, 'data', 'bungo_map.db')
+        # 全ステップで共有する接続（PRAGMAとページキャッシュをステップ間で維持）
+        self._conn = _open_conn(self.db_path)
         self.enricher = SentencePlacesEnricher()
         self.metadata_extractor = AozoraMetadataExtractor()
         print("✅ メンテナンスパイプライン初期化完了")
@@ -63,6 +88,9 @@ class MaintenancePipeline:
         }
         
         try:
+            # 一括更新前にインデックスとクエリプランナー統計を整備
+            self._prepare_bulk_maintenance()
+            
             # ステップ1: sentence_placesテーブル補完
             print("\n🔄 ステップ1: sentence_placesテーブル作者・作品情報補完...")
             step1_result = self.enrich_sentence_places()
@@ -125,6 +153,28 @@ class MaintenancePipeline:
         self._print_report(results)
         return results
     
+    def _prepare_bulk_maintenance(self):
+        """sentence_id結合用インデックスを作成し、ANALYZEで統計情報を更新"""
+        print("📈 インデックス・統計情報を更新中...")
+        self._conn.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_sentence_places_sentence ON sentence_places(sentence_id);
+            ANALYZE sentences;
+            ANALYZE sentence_places;
+            PRAGMA optimize;
+        """)
+        
+        # init_db 以前に作成されたDB向けに、状況確認用の部分インデックスも整備
+        self._create_status_indexes()
+    
+    def _create_status_indexes(self):
+        """状況確認用の部分インデックス（init_db と同じ定義）を作成（対象列が未作成なら見送り）"""
+        for index_sql in STATUS_PARTIAL_INDEXES:
+            try:
+                self._conn.execute(index_sql)
+            except sqlite3.OperationalError as e:
+                print(f"⚠️ 部分インデックス作成スキップ: {e}")
+        self._conn.commit()
+    
     def enrich_sentence_places(self) -> Dict[str, Any]:
         """sentence_placesテーブルの作者・作品情報補完"""
         try:
@@ -144,33 +194,8 @@ class MaintenancePipeline:
     def enrich_works_metadata(self) -> Dict[str, Any]:
         """worksテーブルのメタデータ補完"""
         try:
-            # enrich_works_metadata.pyを実行
-            result = subprocess.run([
-                'python3', 'enrich_works_metadata.py'
-            ], capture_output=True, text=True, cwd=current_dir)
-            
-            if result.returncode == 0:
-                # 成功時の処理件数を出力から抽出
-                output_lines = result.stdout.split('\n')
-                enriched_count = 0
-                for line in output_lines:
-                    if '件処理完了' in line:
-                        try:
-                            enriched_count = int(line.split('件処理完了')[0].split()[-1])
-                        except:
-                            pass
-                
-                return {
-                    'success': True,
-                    'enriched_count': enriched_count,
-                    'errors': []
-                }
-            else:
-                return {
-                    'success': False,
-                    'enriched_count': 0,
-                    'errors': [result.stderr]
-                }
+            # 初期化済みの抽出器を渡してプロセス内で実行
+            return run_enrich_works_metadata(self.metadata_extractor)
         except Exception as e:
             return {
                 'success': False,
@@ -181,33 +206,7 @@ class MaintenancePipeline:
     def update_publication_years(self) -> Dict[str, Any]:
         """sentence_placesのwork_publication_year補完"""
         try:
-            # update_work_publication_year.pyを実行
-            result = subprocess.run([
-                'python3', 'update_work_publication_year.py'
-            ], capture_output=True, text=True, cwd=current_dir)
-            
-            if result.returncode == 0:
-                # 成功時の処理件数を出力から抽出
-                output_lines = result.stdout.split('\n')
-                updated_count = 0
-                for line in output_lines:
-                    if '件更新' in line:
-                        try:
-                            updated_count = int(line.split('件更新')[0].split()[-1])
-                        except:
-                            pass
-                
-                return {
-                    'success': True,
-                    'updated_count': updated_count,
-                    'errors': []
-                }
-            else:
-                return {
-                    'success': False,
-                    'updated_count': 0,
-                    'errors': [result.stderr]
-                }
+            return run_update_work_publication_year(self.db_path, conn=self._conn)
         except Exception as e:
             return {
                 'success': False,
@@ -218,26 +217,34 @@ class MaintenancePipeline:
     def fix_matched_text(self) -> Dict[str, Any]:
         """matched_textフィールドの修正（地名のみ→文全体）"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._conn.cursor()
             
-            # 修正前の状態確認
-            cursor.execute("SELECT COUNT(*) FROM sentence_places")
-            total_count = cursor.fetchone()[0]
-            
-            # matched_textを対応するsentence_textで更新
-            cursor.execute("""
-                UPDATE sentence_places 
-                SET matched_text = (
-                    SELECT sentence_text 
-                    FROM sentences 
-                    WHERE sentences.sentence_id = sentence_places.sentence_id
-                )
-            """)
+            # matched_textを対応するsentence_textで更新（値が変わる行のみ）
+            if sqlite3.sqlite_version_info >= (3, 33, 0):
+                cursor.execute("""
+                    UPDATE sentence_places AS sp
+                    SET matched_text = s.sentence_text
+                    FROM sentences AS s
+                    WHERE s.sentence_id = sp.sentence_id
+                      AND sp.matched_text IS NOT s.sentence_text
+                """)
+            else:
+                cursor.execute("""
+                    UPDATE sentence_places 
+                    SET matched_text = (
+                        SELECT sentence_text 
+                        FROM sentences 
+                        WHERE sentences.sentence_id = sentence_places.sentence_id
+                    )
+                    WHERE EXISTS (
+                        SELECT 1 FROM sentences
+                        WHERE sentences.sentence_id = sentence_places.sentence_id
+                          AND sentence_places.matched_text IS NOT sentences.sentence_text
+                    )
+                """)
             
             fixed_count = cursor.rowcount
-            conn.commit()
-            conn.close()
+            self._conn.commit()
             
             return {
                 'success': True,
@@ -245,6 +252,7 @@ class MaintenancePipeline:
                 'errors': []
             }
         except Exception as e:
+            self._conn.rollback()
             return {
                 'success': False,
                 'fixed_count': 0,
@@ -254,31 +262,28 @@ class MaintenancePipeline:
     def get_database_status(self) -> Dict[str, Any]:
         """データベース状況確認"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._conn.cursor()
             
             status = {}
             
-            # 基本統計
-            cursor.execute("SELECT COUNT(*) FROM authors")
-            status['total_authors'] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM works")
-            status['total_works'] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM sentences")
-            status['total_sentences'] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM sentence_places")
-            status['total_sentence_places'] = cursor.fetchone()[0]
-            
-            # sentence_placesの補完状況
-            cursor.execute("SELECT COUNT(*) FROM sentence_places WHERE author_name IS NOT NULL")
-            status['enriched_sentence_places'] = cursor.fetchone()[0]
-            
-            # worksのメタデータ補完状況
-            cursor.execute("SELECT COUNT(*) FROM works WHERE publication_year IS NOT NULL")
-            status['works_with_publication_year'] = cursor.fetchone()[0]
+            # 基本統計・補完状況（1回のクエリでまとめて集計）
+            cursor.execute("""
+                SELECT
+                    (SELECT COUNT(*) FROM authors),
+                    (SELECT COUNT(*) FROM works),
+                    (SELECT COUNT(*) FROM sentences),
+                    (SELECT COUNT(*) FROM sentence_places),
+                    (SELECT COUNT(*) FROM sentence_places WHERE author_name IS NOT NULL),
+                    (SELECT COUNT(*) FROM works WHERE publication_year IS NOT NULL)
+            """)
+            (
+                status['total_authors'],
+                status['total_works'],
+                status['total_sentences'],
+                status['total_sentence_places'],
+                status['enriched_sentence_places'],
+                status['works_with_publication_year']
+            ) = cursor.fetchone()
             
             # matched_textの状況（サンプル確認）
             cursor.execute("SELECT matched_text, place_name_only FROM sentence_places LIMIT 1")
@@ -288,12 +293,17 @@ class MaintenancePipeline:
             else:
                 status['matched_text_fixed'] = False
             
-            conn.close()
             return status
             
         except Exception as e:
             return {'error': str(e)}
     
+    def close(self):
+        """共有接続を閉じる"""
+        if self._conn is not None:
+            _close_conn(self._conn)
+            self._conn = None
+    
     def _print_report(self, results: Dict[str, Any]):
         """レポート表示"""
         print(f"\n🎉 メンテナンスパイプライン完了レポート")
@@ -356,59 +366,63 @@ def main():
     
     pipeline = MaintenancePipeline()
     
-    if args.status:
-        print("🔍 データベース状況確認")
-        print("=" * 60)
-        status = pipeline.get_database_status()
-        
-        if 'error' in status:
-            print(f"❌ エラー: {status['error']}")
-        else:
-            print(f"👤 作者数: {status['total_authors']:,}件")
-            print(f"📚 作品数: {status['total_works']:,}件")
-            print(f"📝 センテンス数: {status['total_sentences']:,}件")
-            print(f"🗺️ 地名関連数: {status['total_sentence_places']:,}件")
-            print(f"✅ sentence_places補完済み: {status['enriched_sentence_places']:,}件")
-            print(f"📅 出版年あり作品: {status['works_with_publication_year']:,}件")
-            print(f"🔧 matched_text修正済み: {'はい' if status['matched_text_fixed'] else 'いいえ'}")
-        
-    elif args.all:
-        pipeline.run_all_maintenance()
-        
-    elif args.enrich_sentence_places:
-        print("🔄 sentence_places補完実行...")
-        result = pipeline.enrich_sentence_places()
-        if result['success']:
-            print(f"✅ 完了: {result['enriched_count']}件補完")
-        else:
-            print(f"❌ 失敗: {result['errors']}")
+    try:
+        if args.status:
+            print("🔍 データベース状況確認")
+            print("=" * 60)
+            status = pipeline.get_database_status()
             
-    elif args.enrich_works_metadata:
-        print("🔄 worksメタデータ補完実行...")
-        result = pipeline.enrich_works_metadata()
-        if result['success']:
-            print(f"✅ 完了: {result['enriched_count']}件補完")
-        else:
-            print(f"❌ 失敗: {result['errors']}")
+            if 'error' in status:
+                print(f"❌ エラー: {status['error']}")
+            else:
+                print(f"👤 作者数: {status['total_authors']:,}件")
+                print(f"📚 作品数: {status['total_works']:,}件")
+                print(f"📝 センテンス数: {status['total_sentences']:,}件")
+                print(f"🗺️ 地名関連数: {status['total_sentence_places']:,}件")
+                print(f"✅ sentence_places補完済み: {status['enriched_sentence_places']:,}件")
+                print(f"📅 出版年あり作品: {status['works_with_publication_year']:,}件")
+                print(f"🔧 matched_text修正済み: {'はい' if status['matched_text_fixed'] else 'いいえ'}")
             
-    elif args.update_publication_year:
-        print("🔄 出版年更新実行...")
-        result = pipeline.update_publication_years()
-        if result['success']:
-            print(f"✅ 完了: {result['updated_count']}件更新")
-        else:
-            print(f"❌ 失敗: {result['errors']}")
+        elif args.all:
+            pipeline.run_all_maintenance()
             
-    elif args.fix_matched_text:
-        print("🔄 matched_text修正実行...")
-        result = pipeline.fix_matched_text()
-        if result['success']:
-            print(f"✅ 完了: {result['fixed_count']}件修正")
+        elif args.enrich_sentence_places:
+            print("🔄 sentence_places補完実行...")
+            result = pipeline.enrich_sentence_places()
+            if result['success']:
+                print(f"✅ 完了: {result['enriched_count']}件補完")
+            else:
+                print(f"❌ 失敗: {result['errors']}")
+                
+        elif args.enrich_works_metadata:
+            print("🔄 worksメタデータ補完実行...")
+            result = pipeline.enrich_works_metadata()
+            if result['success']:
+                print(f"✅ 完了: {result['enriched_count']}件補完")
+            else:
+                print(f"❌ 失敗: {result['errors']}")
+                
+        elif args.update_publication_year:
+            print("🔄 出版年更新実行...")
+            result = pipeline.update_publication_years()
+            if result['success']:
+                print(f"✅ 完了: {result['updated_count']}件更新")
+            else:
+                print(f"❌ 失敗: {result['errors']}")
+                
+        elif args.fix_matched_text:
+            print("🔄 matched_text修正実行...")
+            result = pipeline.fix_matched_text()
+            if result['success']:
+                print(f"✅ 完了: {result['fixed_count']}件修正")
+            else:
+                print(f"❌ 失敗: {result['errors']}")
+                
         else:
-            print(f"❌ 失敗: {result['errors']}")
-            
-    else:
-        parser.print_help()
+            parser.print_help()
+    
+    finally:
+        pipeline.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -14,10 +14,13 @@
 import sys
 import os
 import sqlite3
-import spacy
 import re
 import time
-from typing import Dict, List, Optional, Tuple
+import logging
+from functools import lru_cache
+from itertools import count
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 
 # パス設定
@@ -25,14 +28,81 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from .place_master_manager import PlaceMasterManagerV2
 
+# センテンス・候補単位の処理ログ（DEBUG時のみ整形・出力）
+logger = logging.getLogger(__name__)
+
+# 抽出に使わないGinZAコンポーネント（ents / pos_ / idx / text のみ参照）
+UNUSED_GINZA_PIPES = ('parser', 'compound_splitter', 'bunsetu_recognizer')
+
+# 無効な地名候補パターン（1つの正規表現に結合して1回で判定）
+INVALID_CANDIDATE_PATTERNS = (
+    r'[0-9]+',  # 数字のみ
+    r'[ぁ-ん]+',  # ひらがなのみ
+    r'[一二三四五六七八九十]+',  # 漢数字のみ
+    r'[、。！？]+',  # 記号のみ
+)
+INVALID_CANDIDATE_RE = re.compile('^(?:' + '|'.join(INVALID_CANDIDATE_PATTERNS) + ')$')
+
+# 一般的な非地名語
+NON_PLACE_WORDS = frozenset({
+    'こと', 'もの', 'とき', 'ところ', 'あの', 'その', 'この',
+    '私', '僕', '君', '彼', '彼女', '先生', '様', 'さん',
+    '今日', '明日', '昨日', '今', '後', '前', '時'
+})
+
+# 地名パターン（固有名詞トークンを1回の走査で判定）
+PLACE_PATTERNS = (
+    r'[東西南北]?[都道府県市区町村郡]',
+    r'.*[山川島湖港駅]$',
+    r'.*[神社寺院]$',
+    r'.*[大学高校]$',
+    r'[0-9]*[丁目番地号]',
+)
+PLACE_PATTERN_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in PLACE_PATTERNS))
+
+# 地名抽出対象のデータベース
+DB_PATH = Path(__file__).resolve().parents[2] / 'data' / 'bungo_map.db'
+
+# 進捗表示の間隔（センテンス数）
+PROGRESS_INTERVAL = 1000
+
+# nlp.pipe に一度に渡すセンテンス数
+NLP_PIPE_BATCH_SIZE = 256
+
+# この信頼度以上の候補（複合地名等）は新規マスター作成時のAI検証を省略
+AI_VALIDATION_SKIP_CONFIDENCE = 0.9
+
+# 地名候補の最小文字数（これより短いセンテンスは解析せずに終了）
+MIN_PLACE_LENGTH = 2
+
+# 複合地名判定用の文字集合
+PREFECTURE_SUFFIXES = ('都', '道', '府', '県')
+MUNICIPALITY_CHARS = frozenset('市区町村')
+
+# 複合地名の前提条件（都道府県の後ろに市区町村の文字がある文のみトークン走査する）
+COMPOUND_PLACE_HINT_RE = re.compile(r'[都道府県].*[市区町村]', re.DOTALL)
+
+
+@lru_cache(maxsize=8192)
+def _is_invalid_place_candidate(text: str) -> bool:
+    """無効な地名候補の判定本体（純粋関数のためキャッシュ）"""
+    if INVALID_CANDIDATE_RE.match(text):
+        return True
+    
+    return text in NON_PLACE_WORDS
+
 
 class EnhancedPlaceExtractorV3:
     """高精度地名抽出システム v3.0"""
-    
+
     def __init__(self):
-        # GinZA初期化
+        # GinZA初期化（係り受け解析等の未使用コンポーネントは無効化）
         try:
+            import spacy  # 抽出器生成時まで重いspaCy/GinZAの読み込みを遅延
             self.nlp = spacy.load('ja_ginza')
+            for pipe_name in UNUSED_GINZA_PIPES:
+                if pipe_name in self.nlp.pipe_names:
+                    self.nlp.disable_pipe(pipe_name)
         except Exception as e:
             print(f"⚠️ GinZAロードエラー: {e}")
             self.nlp = None
@@ -52,20 +122,14 @@ class EnhancedPlaceExtractorV3:
         }
         
         # 地名パターン
-        self.place_patterns = [
-            r'[東西南北]?[都道府県市区町村郡]',
-            r'.*[山川島湖港駅]$',
-            r'.*[神社寺院]$',
-            r'.*[大学高校]$',
-            r'[0-9]*[丁目番地号]',
-        ]
+        self.place_patterns = list(PLACE_PATTERNS)
         
         print("🚀 高精度地名抽出システム v3.0 初期化完了")
         print("✅ 地名マスター優先設計による効率的な処理が可能です")
     
     def extract_places_from_sentence(self, sentence_id: int, sentence_text: str, 
-                                   work_title: str = None) -> List[Dict]:
-        """センテンスから地名抽出（マスター優先処理）"""
+                                   work_title: str = None, doc=None) -> List[Dict]:
+        """センテンスから地名抽出（マスター優先処理、doc に解析済みDocを渡すとGinZA解析を省略）"""
         start_time = time.time()
         extracted_places = []
         
@@ -76,16 +140,22 @@ class EnhancedPlaceExtractorV3:
             
             self.stats['sentences_processed'] += 1
             
+            # 地名候補になり得ない短いセンテンスはGinZA解析を省略
+            if not sentence_text or len(sentence_text.strip()) < MIN_PLACE_LENGTH:
+                return []
+            
             # GinZAによる自然言語処理
-            doc = self.nlp(sentence_text)
+            if doc is None:
+                doc = self.nlp(sentence_text)
             
-            # 地名候補抽出
-            place_candidates = []
+            # 地名候補抽出（抽出しながらテキスト単位で最良候補に統合）
+            best_candidates = {}
+            order = count()
             
             # 1. 固有表現抽出
             for ent in doc.ents:
                 if ent.label_ in ['GPE', 'LOC', 'FAC']:  # 地政学的実体、場所、施設
-                    place_candidates.append({
+                    self._merge_candidate(best_candidates, next(order), {
                         'text': ent.text,
                         'start': ent.start_char,
                         'end': ent.end_char,
@@ -93,63 +163,70 @@ class EnhancedPlaceExtractorV3:
                         'confidence': 0.8
                     })
             
-            # 2. 品詞ベース抽出
+            # 2. 品詞ベース抽出（統合済みテキストは信頼度で負けるため照合を省略）
             for token in doc:
-                if token.pos_ == 'PROPN':  # 固有名詞
-                    # 地名パターンマッチング
-                    for pattern in self.place_patterns:
-                        if re.search(pattern, token.text):
-                            place_candidates.append({
-                                'text': token.text,
-                                'start': token.idx,
-                                'end': token.idx + len(token.text),
-                                'label': 'PATTERN',
-                                'confidence': 0.6
-                            })
-                            break
+                if token.pos_ != 'PROPN':  # 固有名詞のみ
+                    continue
+                token_text = token.text
+                if token_text.strip() in best_candidates:
+                    continue
+                
+                # 地名パターンマッチング
+                if PLACE_PATTERN_RE.search(token_text):
+                    start = token.idx
+                    self._merge_candidate(best_candidates, next(order), {
+                        'text': token_text,
+                        'start': start,
+                        'end': start + len(token_text),
+                        'label': 'PATTERN',
+                        'confidence': 0.6
+                    })
             
-            # 3. 複合地名抽出
-            place_candidates.extend(self.extract_compound_places(doc))
+            # 3. 複合地名抽出（生成しながら統合し、中間リストを作らない）
+            for candidate in self.extract_compound_places(doc):
+                self._merge_candidate(best_candidates, next(order), candidate)
             
-            # 重複除去
-            unique_candidates = self.deduplicate_candidates(place_candidates)
+            # 重複除去済み候補を信頼度順に取得
+            unique_candidates = self._ranked_candidates(best_candidates)
             
-            # 各候補をマスターシステムで処理
-            for candidate in unique_candidates:
-                place_text = candidate['text']
-                
-                print(f"🔍 地名候補処理: {place_text}")
-                
-                # マスター検索・登録
-                master_id = self.place_manager.extract_and_register_place(
-                    place_text=place_text,
-                    sentence_id=sentence_id,
-                    sentence_text=sentence_text,
-                    extraction_method='ginza_v3'
-                )
-                
-                if master_id:
-                    place_info = {
-                        'master_id': master_id,
-                        'place_text': place_text,
-                        'start_position': candidate['start'],
-                        'end_position': candidate['end'],
-                        'extraction_method': 'ginza_v3',
-                        'confidence': candidate['confidence'],
-                        'label': candidate['label']
-                    }
+            # 各候補をマスターシステムで処理（センテンス内の書き込みは1回のコミットにまとめる）
+            with self.place_manager.batch():
+                for candidate in unique_candidates:
+                    place_text = candidate['text']
+                    
+                    logger.debug("🔍 地名候補処理: %s", place_text)
                     
-                    extracted_places.append(place_info)
-                    self.stats['places_extracted'] += 1
+                    # マスター検索・登録
+                    master_id = self.place_manager.extract_and_register_place(
+                        place_text=place_text,
+                        sentence_id=sentence_id,
+                        sentence_text=sentence_text,
+                        extraction_method='ginza_v3',
+                        skip_ai_validation=candidate['confidence'] >= AI_VALIDATION_SKIP_CONFIDENCE
+                    )
                     
-                    print(f"✅ 地名登録完了: {place_text} (master_id: {master_id})")
-                else:
-                    print(f"⚠️ 地名登録失敗: {place_text}")
+                    if master_id:
+                        place_info = {
+                            'master_id': master_id,
+                            'place_text': place_text,
+                            'start_position': candidate['start'],
+                            'end_position': candidate['end'],
+                            'extraction_method': 'ginza_v3',
+                            'confidence': candidate['confidence'],
+                            'label': candidate['label']
+                        }
+                        
+                        extracted_places.append(place_info)
+                        self.stats['places_extracted'] += 1
+                        
+                        logger.debug("✅ 地名登録完了: %s (master_id: %s)", place_text, master_id)
+                    else:
+                        logger.debug("⚠️ 地名登録失敗: %s", place_text)
             
             processing_time = time.time() - start_time
             self.stats['processing_time'] += processing_time
             
-            print(f"📊 センテンス処理完了: {len(extracted_places)}件の地名抽出 ({processing_time:.3f}秒)")
+            logger.debug("📊 センテンス処理完了: %d件の地名抽出 (%.3f秒)", len(extracted_places), processing_time)
             
             return extracted_places
             
@@ -157,88 +234,87 @@ class EnhancedPlaceExtractorV3:
             print(f"❌ 地名抽出エラー (sentence_id: {sentence_id}): {e}")
             return []
     
-    def extract_compound_places(self, doc) -> List[Dict]:
-        """複合地名抽出（「東京都千代田区」等）"""
-        compounds = []
-        
+    def extract_compound_places(self, doc) -> Iterator[Dict]:
+        """複合地名抽出（「東京都千代田区」等、候補を1件ずつ生成）"""
         try:
-            # 連続する地名要素を検出
-            for i, token in enumerate(doc):
-                if i < len(doc) - 1:
-                    current = token.text
-                    next_token = doc[i + 1].text
-                    
-                    # 都道府県 + 市区町村パターン
-                    if (re.search(r'[都道府県]$', current) and 
-                        re.search(r'[市区町村]', next_token)):
-                        
-                        compound_text = current + next_token
-                        compounds.append({
-                            'text': compound_text,
-                            'start': token.idx,
-                            'end': doc[i + 1].idx + len(next_token),
-                            'label': 'COMPOUND',
-                            'confidence': 0.9
-                        })
+            # 該当文字の並びがない文（大半の文）は正規表現1回で判定してトークン走査を省略
+            if not COMPOUND_PLACE_HINT_RE.search(doc.text):
+                return
             
-            return compounds
+            # 連続する地名要素を検出（隣接トークン対を1回ずつ走査）
+            for token, following in zip(doc, doc[1:]):
+                current = token.text
+                next_token = following.text
+                
+                # 都道府県 + 市区町村パターン（文字集合による判定）
+                if (current.endswith(PREFECTURE_SUFFIXES) and 
+                    not MUNICIPALITY_CHARS.isdisjoint(next_token)):
+                    
+                    yield {
+                        'text': current + next_token,
+                        'start': token.idx,
+                        'end': following.idx + len(next_token),
+                        'label': 'COMPOUND',
+                        'confidence': 0.9
+                    }
             
         except Exception as e:
             print(f"⚠️ 複合地名抽出エラー: {e}")
-            return []
     
     def deduplicate_candidates(self, candidates: List[Dict]) -> List[Dict]:
         """地名候補の重複除去"""
-        unique_candidates = []
-        seen_texts = set()
+        best = {}
+        for index, candidate in enumerate(candidates):
+            self._merge_candidate(best, index, candidate)
         
-        # 信頼度の高い順にソート
-        sorted_candidates = sorted(candidates, key=lambda x: x['confidence'], reverse=True)
+        return self._ranked_candidates(best)
+    
+    def _merge_candidate(self, best: Dict, order: int, candidate: Dict):
+        """候補をテキスト単位の最良候補に統合（best: text -> (出現順, 候補) / 無効はNone）"""
+        text = candidate['text'].strip()
         
-        for candidate in sorted_candidates:
-            text = candidate['text'].strip()
-            
-            if text and text not in seen_texts and len(text) > 1:
-                # 基本的なフィルタリング
-                if not self.is_invalid_place_candidate(text):
-                    unique_candidates.append(candidate)
-                    seen_texts.add(text)
+        if len(text) <= 1:
+            return
         
-        return unique_candidates
+        if text in best:
+            current = best[text]
+            if current is None or current[1]['confidence'] >= candidate['confidence']:
+                return
+        elif self.is_invalid_place_candidate(text):
+            # 基本的なフィルタリング（テキスト単位で1回のみ）
+            best[text] = None
+            return
+        
+        best[text] = (order, candidate)
+    
+    def _ranked_candidates(self, best: Dict) -> List[Dict]:
+        """統合済み候補を信頼度の高い順（同率は出現順）に並べる"""
+        winners = sorted(
+            (entry for entry in best.values() if entry is not None),
+            key=lambda entry: (-entry[1]['confidence'], entry[0])
+        )
+        return [candidate for _, candidate in winners]
     
     def is_invalid_place_candidate(self, text: str) -> bool:
         """無効な地名候補の判定"""
-        invalid_patterns = [
-            r'^[0-9]+$',  # 数字のみ
-            r'^[ぁ-ん]+$',  # ひらがなのみ
-            r'^[一二三四五六七八九十]+$',  # 漢数字のみ
-            r'^[、。！？]+$',  # 記号のみ
-        ]
-        
-        for pattern in invalid_patterns:
-            if re.match(pattern, text):
-                return True
-        
-        # 一般的な非地名語
-        non_place_words = {
-            'こと', 'もの', 'とき', 'ところ', 'あの', 'その', 'この',
-            '私', '僕', '君', '彼', '彼女', '先生', '様', 'さん',
-            '今日', '明日', '昨日', '今', '後', '前', '時'
-        }
-        
-        return text in non_place_words
+        return _is_invalid_place_candidate(text)
     
     def process_work_sentences(self, work_id: int, work_title: str = None) -> Dict:
         """作品の全センテンスから地名抽出"""
         print(f"📚 作品地名抽出開始: {work_title or work_id}")
         start_time = time.time()
+        conn = None
         
         try:
             # センテンス取得
-            db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'bungo_map.db')
-            conn = sqlite3.connect(db_path)
+            # 読み取り専用で開き、地名マスター側の書き込み接続とはロックを競合させない（WALで並行読み取り）
+            conn = sqlite3.connect(f"{DB_PATH.as_uri()}?mode=ro", uri=True)
             cursor = conn.cursor()
             
+            cursor.execute("SELECT COUNT(*) FROM sentences WHERE work_id = ?", (work_id,))
+            total_sentences = cursor.fetchone()[0]
+            
+            # 全件をメモリに載せず、カーソルから逐次取得して処理
             cursor.execute("""
                 SELECT sentence_id, sentence_text 
                 FROM sentences 
@@ -246,15 +322,12 @@ class EnhancedPlaceExtractorV3:
                 ORDER BY sentence_order
             """, (work_id,))
             
-            sentences = cursor.fetchall()
-            conn.close()
-            
-            print(f"📊 処理対象センテンス: {len(sentences)}件")
+            print(f"📊 処理対象センテンス: {total_sentences}件")
             
             work_stats = {
                 'work_id': work_id,
                 'work_title': work_title,
-                'total_sentences': len(sentences),
+                'total_sentences': total_sentences,
                 'processed_sentences': 0,
                 'total_places': 0,
                 'unique_places': 0,
@@ -264,24 +337,40 @@ class EnhancedPlaceExtractorV3:
             all_extracted_places = []
             unique_masters = set()
             
-            for sentence_id, sentence_text in sentences:
-                places = self.extract_places_from_sentence(
-                    sentence_id=sentence_id,
-                    sentence_text=sentence_text,
-                    work_title=work_title
+            # GinZAはnlp.pipeでまとめて解析し、センテンスごとの呼び出しオーバーヘッドを削減
+            if self.nlp:
+                parsed_sentences = (
+                    (sentence_id, sentence_text, doc)
+                    for doc, (sentence_id, sentence_text) in self.nlp.pipe(
+                        ((sentence_text or '', (sentence_id, sentence_text)) for sentence_id, sentence_text in cursor),
+                        as_tuples=True,
+                        batch_size=NLP_PIPE_BATCH_SIZE
+                    )
                 )
-                
-                all_extracted_places.extend(places)
-                work_stats['processed_sentences'] += 1
-                work_stats['total_places'] += len(places)
-                
-                # ユニーク地名カウント
-                for place in places:
-                    unique_masters.add(place['master_id'])
-                
-                # 進捗表示
-                if work_stats['processed_sentences'] % 100 == 0:
-                    print(f"⏳ 進捗: {work_stats['processed_sentences']}/{len(sentences)} センテンス処理完了")
+            else:
+                parsed_sentences = ((sentence_id, sentence_text, None) for sentence_id, sentence_text in cursor)
+            
+            # 新規マスターのジオコーディングは作品単位でまとめて並列実行
+            with self.place_manager.deferred_geocoding():
+                for sentence_id, sentence_text, doc in parsed_sentences:
+                    places = self.extract_places_from_sentence(
+                        sentence_id=sentence_id,
+                        sentence_text=sentence_text,
+                        work_title=work_title,
+                        doc=doc
+                    )
+                    
+                    all_extracted_places.extend(places)
+                    work_stats['processed_sentences'] += 1
+                    work_stats['total_places'] += len(places)
+                    
+                    # ユニーク地名カウント
+                    for place in places:
+                        unique_masters.add(place['master_id'])
+                    
+                    # 進捗表示
+                    if work_stats['processed_sentences'] % PROGRESS_INTERVAL == 0:
+                        print(f"⏳ 進捗: {work_stats['processed_sentences']}/{total_sentences} センテンス処理完了")
             
             work_stats['unique_places'] = len(unique_masters)
             work_stats['processing_time'] = time.time() - start_time
@@ -295,6 +384,11 @@ class EnhancedPlaceExtractorV3:
         except Exception as e:
             print(f"❌ 作品地名抽出エラー: {e}")
             return {}
+        
+        finally:
+            # 抽出・ジオコーディングの失敗時も読み取り接続を閉じる
+            if conn is not None:
+                conn.close()
     
     def get_extraction_statistics(self) -> Dict:
         """抽出統計情報取得"""
@@ -13,13 +13,18 @@
 
 import sqlite3
 import re
+import logging
 import json
 import time
 import hashlib
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime
 import sys
 import os
+from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 # パス設定
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -28,6 +33,122 @@ from database.manager import DatabaseManager
 from ai.geocoding import GeocodingEngine
 from ai.llm import LLMClient
 
+# 地名ごとの処理ログ（DEBUG時のみ整形・出力）
+logger = logging.getLogger(__name__)
+
+# 正規化ルール
+NORMALIZATION_RULES = {
+    # 全角・半角統一
+    '１': '1', '２': '2', '３': '3', '４': '4', '５': '5',
+    '６': '6', '７': '7', '８': '8', '９': '9', '０': '0',
+    
+    # 漢字異表記統一
+    '東亰': '東京', '大坂': '大阪', '横濱': '横浜',
+    
+    # 地名接尾辞正規化
+    '県': '', '府': '', '市': '', '区': '', '町': '', '村': ''
+}
+
+# 1文字ルールは str.translate で一括変換、複数文字ルールのみ逐次置換
+_SINGLE_CHAR_TRANS = str.maketrans(
+    {old: new for old, new in NORMALIZATION_RULES.items() if len(old) == 1}
+)
+_MULTI_CHAR_RULES = tuple(
+    (old, new) for old, new in NORMALIZATION_RULES.items() if len(old) > 1
+)
+
+# 末尾の助詞（「〜の」「〜に」等）と重複文字の正規表現
+TRAILING_PARTICLE_RE = re.compile(r'[のにへでを]$')
+REPEATED_CHAR_RE = re.compile(r'([山川島])\1+')
+
+
+@lru_cache(maxsize=65536)
+def _normalize_place_name(place_name: str) -> str:
+    """地名の正規化本体（純粋関数のためキャッシュ）"""
+    normalized = place_name.strip()
+    
+    # 基本的な正規化（異表記統一 → 数字・接尾辞の一括変換）
+    for old, new in _MULTI_CHAR_RULES:
+        normalized = normalized.replace(old, new)
+    normalized = normalized.translate(_SINGLE_CHAR_TRANS)
+    
+    # 特殊パターンの処理
+    # 「〜の」「〜に」等の助詞除去
+    normalized = TRAILING_PARTICLE_RE.sub('', normalized)
+    
+    # 重複文字の統一
+    normalized = REPEATED_CHAR_RE.sub(r'\1', normalized)
+    
+    return normalized
+
+
+# 永続接続のSQLite設定（WAL・同期緩和・メモリ上の一時領域・大きめのキャッシュ・ロック待機）
+SQLITE_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-65536;
+    PRAGMA busy_timeout=5000;
+"""
+
+# trigram全文検索で部分一致を索引検索できる最小文字数（これより短い語はLIKEで走査）
+FTS_MIN_QUERY_LENGTH = 3
+
+# センテンス地名関係の登録SQL（batch() 内では executemany でまとめて登録）
+SENTENCE_PLACE_INSERT_SQL = """
+    INSERT OR REPLACE INTO sentence_places (
+        sentence_id, master_id, matched_text, place_name, full_sentence,
+        extraction_method, extraction_confidence,
+        context_before, context_after,
+        author_name, author_birth_year, author_death_year,
+        work_title, position_in_sentence,
+        quality_score, relevance_score, verification_status,
+        created_at
+    ) VALUES (?, ?, ?, ?, ?, ?, 0.8, ?, ?, ?, ?, ?, ?, ?, 0.8, 0.8, 'auto', CURRENT_TIMESTAMP)
+"""
+
+# 使用統計の加算SQL（batch() 内ではマスターごとに回数をまとめて加算）
+MASTER_USAGE_UPDATE_SQL = """
+    UPDATE place_masters SET
+        usage_count = usage_count + ?,
+        last_used_at = CURRENT_TIMESTAMP
+    WHERE master_id = ?
+"""
+
+# マスター地名の登録SQL（normalized_name の UNIQUE 制約で競合した場合は既存行の使用回数を加算して同じIDを返す、
+# 却下済みの既存行は更新せず行を返さない）
+MASTER_UPSERT_SQL = """
+    INSERT INTO place_masters (
+        normalized_name, display_name, canonical_name,
+        validation_status, first_used_at, last_used_at, usage_count
+    ) VALUES (?, ?, ?, 'pending', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, 1)
+    ON CONFLICT(normalized_name) DO UPDATE SET
+        usage_count = usage_count + 1,
+        last_used_at = CURRENT_TIMESTAMP
+    WHERE place_masters.validation_status != 'rejected'
+    RETURNING master_id, display_name, usage_count
+"""
+
+# 座標の保存SQL（1件ずつ・一括のどちらでも使用）
+MASTER_GEOCODING_UPDATE_SQL = """
+    UPDATE place_masters SET
+        latitude = ?, longitude = ?,
+        geocoding_source = ?, geocoding_confidence = ?,
+        geocoding_timestamp = CURRENT_TIMESTAMP,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE master_id = ?
+"""
+
+# 保留したジオコーディングをまとめて実行する際の同時実行数
+# （呼び出し間隔は GeocodingEngine 側の共有レート制限で守り、ここでは応答待ちを重ねる程度に抑える）
+GEOCODING_MAX_WORKERS = 4
+
+# 保留したジオコーディングをこの件数ごとに実行・保存（中断時に失われる保留分を抑える）
+GEOCODING_FLUSH_SIZE = 100
+
+# マスターIDキャッシュの上限件数（超えたら最も長く参照されていないものから破棄）
+MASTER_CACHE_SIZE = 10000
+
 
 class PlaceMasterManagerV2:
     """地名マスター管理システム v2.0"""
@@ -35,26 +156,44 @@ class PlaceMasterManagerV2:
     def __init__(self):
         self.db = DatabaseManager()
         self.db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'bungo_map.db')
+        
+        # 呼び出しごとに接続し直さないよう、接続は1本を使い回す
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.executescript(SQLITE_PRAGMAS)
+        
+        # 部分一致検索用の全文検索インデックス（init_db で作成）が使えるか
+        self._has_place_fts = self._check_place_trigram_index()
+        
         self.llm_client = LLMClient()
         self.geocoder = GeocodingEngine(self.llm_client)
         
         # 正規化ルール
-        self.normalization_rules = {
-            # 全角・半角統一
-            '１': '1', '２': '2', '３': '3', '４': '4', '５': '5',
-            '６': '6', '７': '7', '８': '8', '９': '9', '０': '0',
-            
-            # 漢字異表記統一
-            '東亰': '東京', '大坂': '大阪', '横濱': '横浜',
-            
-            # 地名接尾辞正規化
-            '県': '', '府': '', '市': '', '区': '', '町': '', '村': ''
-        }
+        self.normalization_rules = NORMALIZATION_RULES
         
-        # キャッシュ
+        # キャッシュ（正規化名 → マスターID / 表記・別名・部分一致で解決した地名 → マスターID）
         self._master_cache = {}
         self._alias_cache = {}
         
+        # 検索で見つからなかった地名（新規マスター作成で部分一致の結果が変わるため作成時に全破棄）
+        self._miss_cache = {}
+        
+        # マスターID → 表示名（センテンス関係登録時の再取得を省略）
+        self._display_names = {}
+        
+        # batch() のネスト数（0以外の間は各書き込みでコミットしない）
+        self._batch_depth = 0
+        
+        # batch() 終了時にまとめて登録するセンテンス地名関係・加算する使用回数
+        self._pending_relations = []
+        self._pending_usage = Counter()
+        
+        # deferred_geocoding() のネスト数と、終了時にまとめてジオコーディングする新規マスター
+        self._defer_geocoding_depth = 0
+        self._pending_geocoding = []
+        
+        # 直前に登録したセンテンスの情報・前後文脈（同一文の複数地名で再利用）
+        self._sentence_context = None
+        
         self.stats = {
             'cache_hits': 0,
             'new_masters': 0,
@@ -64,98 +203,179 @@ class PlaceMasterManagerV2:
             'processing_time': 0
         }
     
+    def _check_place_trigram_index(self) -> bool:
+        """trigram索引が想定の列を持ち、全マスターを索引済みか確認（使えなければ部分一致はLIKEで走査）"""
+        try:
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(place_masters_trigram)")]
+            if columns != ['normalized_name', 'display_name']:
+                return False
+            
+            # 外部コンテンツ型のため件数は索引側の docsize で確認する
+            indexed = self._conn.execute("SELECT COUNT(*) FROM place_masters_trigram_docsize").fetchone()[0]
+            total = self._conn.execute("SELECT COUNT(*) FROM place_masters").fetchone()[0]
+            return indexed == total
+        except sqlite3.Error:
+            return False
+    
+    @contextmanager
+    def batch(self):
+        """ブロック内の書き込みを1トランザクション（1回のコミット）にまとめる"""
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._flush_pending_usage()
+                self._flush_pending_relations()
+                self._conn.commit()
+    
+    @contextmanager
+    def deferred_geocoding(self):
+        """ブロック内で作成した新規マスターのジオコーディングを GEOCODING_FLUSH_SIZE 件ごと・終了時にまとめて並列実行"""
+        self._defer_geocoding_depth += 1
+        try:
+            yield
+        finally:
+            self._defer_geocoding_depth -= 1
+            if not self._defer_geocoding_depth:
+                self.geocode_pending_masters()
+    
+    def _flush_pending_usage(self):
+        """保留中の使用回数をマスターごとに1回の UPDATE で加算"""
+        if not self._pending_usage:
+            return
+        
+        try:
+            self._conn.executemany(
+                MASTER_USAGE_UPDATE_SQL,
+                [(usage, master_id) for master_id, usage in self._pending_usage.items()]
+            )
+        except Exception as e:
+            print(f"⚠️ 使用統計一括更新エラー: {e}")
+        finally:
+            self._pending_usage.clear()
+    
+    def _flush_pending_relations(self):
+        """保留中のセンテンス地名関係を executemany で一括登録"""
+        if not self._pending_relations:
+            return
+        
+        try:
+            self._conn.executemany(SENTENCE_PLACE_INSERT_SQL, self._pending_relations)
+        except Exception as e:
+            print(f"❌ センテンス関係一括登録エラー: {e}")
+        finally:
+            self._pending_relations.clear()
+    
+    def _commit(self):
+        """batch() の外であればコミット"""
+        if not self._batch_depth:
+            self._conn.commit()
+    
+    def _cache_master_id(self, cache: Dict[str, Optional[int]], key: str, master_id: Optional[int]):
+        """マスターIDをキャッシュ（上限を超えたら最も長く参照されていないものを破棄）"""
+        if len(cache) >= MASTER_CACHE_SIZE:
+            cache.pop(next(iter(cache)))
+        cache[key] = master_id
+    
+    def _remember_display_name(self, master_id: int, display_name: str):
+        """マスターの表示名を控える（上限を超えたら最も古いものを破棄）"""
+        if len(self._display_names) >= MASTER_CACHE_SIZE:
+            self._display_names.pop(next(iter(self._display_names)))
+        self._display_names[master_id] = display_name
+    
+    def _get_cached_master_id(self, cache: Dict[str, Optional[int]], key: str) -> Optional[int]:
+        """キャッシュ参照（ヒットしたものは末尾へ移し、破棄順をLRUにする）"""
+        master_id = cache.pop(key, None)
+        if master_id is not None:
+            cache[key] = master_id
+        return master_id
+    
     def normalize_place_name(self, place_name: str) -> str:
         """地名の正規化（改良版）"""
         if not place_name:
             return ""
         
-        normalized = place_name.strip()
-        
-        # 基本的な正規化
-        for old, new in self.normalization_rules.items():
-            normalized = normalized.replace(old, new)
-        
-        # 特殊パターンの処理
-        # 「〜の」「〜に」等の助詞除去
-        normalized = re.sub(r'[のにへでを]$', '', normalized)
-        
-        # 重複文字の統一
-        normalized = re.sub(r'([山川島])\1+', r'\1', normalized)
-        
-        return normalized
+        return _normalize_place_name(place_name)
     
     def find_master_by_name(self, place_name: str) -> Optional[int]:
         """地名でマスターIDを検索（キャッシュ対応）"""
-        # キャッシュチェック
-        if place_name in self._master_cache:
+        normalized = self.normalize_place_name(place_name)
+        
+        # キャッシュチェック（正規化名 → 元の表記の順）
+        master_id = (self._get_cached_master_id(self._master_cache, normalized)
+                     or self._get_cached_master_id(self._alias_cache, place_name))
+        if master_id:
             self.stats['cache_hits'] += 1
-            return self._master_cache[place_name]
+            return master_id
         
-        normalized = self.normalize_place_name(place_name)
+        if place_name in self._miss_cache:
+            return None
         
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._conn
             cursor = conn.cursor()
             
-            # 1. 正規化名での直接検索
+            # 1-3. 正規化名・表示名・エイリアスの完全一致を1回のクエリで検索（優先順位の高い1件）
             cursor.execute("""
-                SELECT master_id FROM place_masters 
+                SELECT master_id, display_name, 1 AS priority FROM place_masters 
                 WHERE normalized_name = ? AND validation_status != 'rejected'
-            """, (normalized,))
-            
-            result = cursor.fetchone()
-            if result:
-                master_id = result[0]
-                self._master_cache[place_name] = master_id
-                conn.close()
-                return master_id
-            
-            # 2. 表示名での検索
-            cursor.execute("""
-                SELECT master_id FROM place_masters 
+                UNION ALL
+                SELECT master_id, display_name, 2 FROM place_masters 
                 WHERE display_name = ? AND validation_status != 'rejected'
-            """, (place_name,))
-            
-            result = cursor.fetchone()
-            if result:
-                master_id = result[0]
-                self._master_cache[place_name] = master_id
-                conn.close()
-                return master_id
-            
-            # 3. エイリアスでの検索
-            cursor.execute("""
-                SELECT pm.master_id FROM place_masters pm
+                UNION ALL
+                SELECT pm.master_id, pm.display_name, 3 FROM place_masters pm
                 JOIN place_aliases pa ON pm.master_id = pa.master_id
                 WHERE pa.alias_name = ? AND pm.validation_status != 'rejected'
-            """, (place_name,))
+                ORDER BY priority
+                LIMIT 1
+            """, (normalized, place_name, place_name))
             
             result = cursor.fetchone()
             if result:
-                master_id = result[0]
-                self._master_cache[place_name] = master_id
-                conn.close()
+                master_id, display_name, priority = result
+                self._remember_display_name(master_id, display_name)
+                if priority == 1:
+                    self._cache_master_id(self._master_cache, normalized, master_id)
+                else:
+                    self._cache_master_id(self._alias_cache, place_name, master_id)
                 return master_id
             
-            # 4. 部分マッチ検索（曖昧検索）
-            cursor.execute("""
-                SELECT master_id FROM place_masters 
-                WHERE (normalized_name LIKE ? OR display_name LIKE ?)
-                AND validation_status != 'rejected'
-                ORDER BY 
-                    CASE WHEN normalized_name = ? THEN 1 ELSE 2 END,
-                    LENGTH(normalized_name)
-                LIMIT 1
-            """, (f'%{normalized}%', f'%{place_name}%', normalized))
+            # 4. 部分マッチ検索（曖昧検索、trigramで引ける長さなら全文検索インデックスを使用）
+            if self._has_place_fts and min(len(normalized), len(place_name)) >= FTS_MIN_QUERY_LENGTH:
+                cursor.execute("""
+                    SELECT master_id, display_name FROM place_masters 
+                    WHERE master_id IN (
+                        SELECT rowid FROM place_masters_trigram WHERE normalized_name LIKE ?
+                        UNION
+                        SELECT rowid FROM place_masters_trigram WHERE display_name LIKE ?
+                    )
+                    AND validation_status != 'rejected'
+                    ORDER BY 
+                        CASE WHEN normalized_name = ? THEN 1 ELSE 2 END,
+                        LENGTH(normalized_name)
+                    LIMIT 1
+                """, (f'%{normalized}%', f'%{place_name}%', normalized))
+            else:
+                cursor.execute("""
+                    SELECT master_id, display_name FROM place_masters 
+                    WHERE (normalized_name LIKE ? OR display_name LIKE ?)
+                    AND validation_status != 'rejected'
+                    ORDER BY 
+                        CASE WHEN normalized_name = ? THEN 1 ELSE 2 END,
+                        LENGTH(normalized_name)
+                    LIMIT 1
+                """, (f'%{normalized}%', f'%{place_name}%', normalized))
             
             result = cursor.fetchone()
             if result:
-                master_id = result[0]
-                self._master_cache[place_name] = master_id
-                conn.close()
+                master_id, display_name = result
+                self._remember_display_name(master_id, display_name)
+                self._cache_master_id(self._alias_cache, place_name, master_id)
                 return master_id
             
-            conn.close()
+            self._cache_master_id(self._miss_cache, place_name, None)
             return None
             
         except Exception as e:
@@ -171,33 +391,45 @@ class PlaceMasterManagerV2:
             
             # AI検証（オプション）
             if ai_context and not self.ai_validate_place_name(place_name, ai_context):
-                print(f"⚠️ AI検証により地名として認識されませんでした: {place_name}")
+                logger.debug("⚠️ AI検証により地名として認識されませんでした: %s", place_name)
                 return None
             
             # マスター作成
-            conn = sqlite3.connect(self.db_path)
+            conn = self._conn
             cursor = conn.cursor()
             
-            cursor.execute("""
-                INSERT INTO place_masters (
-                    normalized_name, display_name, canonical_name,
-                    validation_status, first_used_at, last_used_at, usage_count
-                ) VALUES (?, ?, ?, 'pending', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, 1)
-            """, (normalized, place_name, place_name))
+            # 検索後に他の接続が同じ地名を登録していても IntegrityError にせず既存IDを使う
+            # （加算後の使用回数が1なら新規作成、未使用だった既存行も新規と同じく扱う）
+            cursor.execute(MASTER_UPSERT_SQL, (normalized, place_name, place_name))
+            result = cursor.fetchone()
+            if result is None:
+                # 却下済みマスターと競合（find_master_by_name と同じく地名として扱わない）
+                logger.debug("⚠️ 却下済みマスターのため登録しません: %s", place_name)
+                return None
             
-            master_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            master_id, display_name, usage_count = result
+            created = usage_count == 1
+            self._commit()
             
-            print(f"🆕 新規マスター地名作成: {place_name} (ID: {master_id})")
-            self.stats['new_masters'] += 1
+            if created:
+                logger.debug("🆕 新規マスター地名作成: %s (ID: %s)", place_name, master_id)
+                self.stats['new_masters'] += 1
+            else:
+                logger.debug("🎯 登録済みマスター使用: %s (ID: %s)", place_name, master_id)
             
             # キャッシュ更新
-            self._master_cache[place_name] = master_id
-            
-            # ジオコーディング実行（新規のみ）
-            if should_geocode:
-                self.geocode_master_place(master_id, place_name, ai_context)
+            self._cache_master_id(self._master_cache, normalized, master_id)
+            self._remember_display_name(master_id, display_name)
+            self._miss_cache.clear()
+            
+            # ジオコーディング実行（新規のみ、deferred_geocoding() 内では保留）
+            if should_geocode and created:
+                if self._defer_geocoding_depth:
+                    self._pending_geocoding.append((master_id, place_name))
+                    if len(self._pending_geocoding) >= GEOCODING_FLUSH_SIZE:
+                        self.geocode_pending_masters()
+                else:
+                    self.geocode_master_place(master_id, place_name, ai_context)
             
             return master_id
             
@@ -208,24 +440,17 @@ class PlaceMasterManagerV2:
     def geocode_master_place(self, master_id: int, place_name: str, context: str = None):
         """マスター地名のジオコーディング"""
         try:
-            print(f"🌍 ジオコーディング実行: {place_name}")
+            logger.debug("🌍 ジオコーディング実行: %s", place_name)
             
             # ジオコーディング実行
             geocoding_result = self.geocoder.geocode_place(place_name)
             
             if geocoding_result and geocoding_result.latitude and geocoding_result.longitude:
                 # 結果をマスターテーブルに保存
-                conn = sqlite3.connect(self.db_path)
+                conn = self._conn
                 cursor = conn.cursor()
                 
-                cursor.execute("""
-                    UPDATE place_masters SET
-                        latitude = ?, longitude = ?,
-                        geocoding_source = ?, geocoding_confidence = ?,
-                        geocoding_timestamp = CURRENT_TIMESTAMP,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE master_id = ?
-                """, (
+                cursor.execute(MASTER_GEOCODING_UPDATE_SQL, (
                     geocoding_result.latitude,
                     geocoding_result.longitude,
                     geocoding_result.source,
@@ -233,17 +458,58 @@ class PlaceMasterManagerV2:
                     master_id
                 ))
                 
-                conn.commit()
-                conn.close()
+                self._commit()
                 
-                print(f"✅ ジオコーディング完了: {place_name} → ({geocoding_result.latitude}, {geocoding_result.longitude})")
+                logger.debug("✅ ジオコーディング完了: %s → (%s, %s)", place_name, geocoding_result.latitude, geocoding_result.longitude)
                 self.stats['geocoding_executed'] += 1
             else:
-                print(f"⚠️ ジオコーディング失敗: {place_name}")
+                logger.debug("⚠️ ジオコーディング失敗: %s", place_name)
                 
         except Exception as e:
             print(f"❌ ジオコーディングエラー ({place_name}): {e}")
     
+    def _geocode_place_safely(self, place_name: str):
+        """ジオコーディング（ワーカースレッド用、例外は失敗扱い）"""
+        try:
+            return self.geocoder.geocode_place(place_name)
+        except Exception as e:
+            print(f"❌ ジオコーディングエラー ({place_name}): {e}")
+            return None
+    
+    def geocode_pending_masters(self) -> int:
+        """保留中の新規マスターをまとめてジオコーディング（API呼び出しは並列、保存は executemany で一括）"""
+        pending, self._pending_geocoding = self._pending_geocoding, []
+        if not pending:
+            return 0
+        
+        logger.debug("🌍 ジオコーディング一括実行: %d件", len(pending))
+        
+        with ThreadPoolExecutor(max_workers=GEOCODING_MAX_WORKERS) as executor:
+            results = list(executor.map(self._geocode_place_safely, [place_name for _, place_name in pending]))
+        
+        rows = []
+        for (master_id, place_name), geocoding_result in zip(pending, results):
+            if geocoding_result and geocoding_result.latitude and geocoding_result.longitude:
+                rows.append((
+                    geocoding_result.latitude,
+                    geocoding_result.longitude,
+                    geocoding_result.source,
+                    geocoding_result.confidence,
+                    master_id
+                ))
+            else:
+                logger.debug("⚠️ ジオコーディング失敗: %s", place_name)
+        
+        try:
+            self._conn.executemany(MASTER_GEOCODING_UPDATE_SQL, rows)
+            self._commit()
+        except Exception as e:
+            print(f"❌ ジオコーディング結果保存エラー: {e}")
+            return 0
+        
+        self.stats['geocoding_executed'] += len(rows)
+        return len(rows)
+    
     def ai_validate_place_name(self, place_name: str, context: str) -> bool:
         """AI による地名検証"""
         try:
@@ -256,7 +522,7 @@ class PlaceMasterManagerV2:
                 is_place = ai_result.get('is_place_name', False)
                 confidence = ai_result.get('confidence', 0.0)
                 
-                print(f"🤖 AI検証: {place_name} → {is_place} (信頼度: {confidence:.2f})")
+                logger.debug("🤖 AI検証: %s → %s (信頼度: %.2f)", place_name, is_place, confidence)
                 
                 # 信頼度0.7以上で地名として判定
                 return is_place and confidence >= 0.7
@@ -270,37 +536,44 @@ class PlaceMasterManagerV2:
     
     def extract_and_register_place(self, place_text: str, sentence_id: int, 
                                   sentence_text: str = None,
-                                  extraction_method: str = 'ginza') -> Optional[int]:
-        """地名抽出からマスター登録まで一括処理"""
+                                  extraction_method: str = 'ginza',
+                                  skip_ai_validation: bool = False) -> Optional[int]:
+        """地名抽出からマスター登録まで一括処理（skip_ai_validation で新規作成時のAI検証を省略）"""
         start_time = time.time()
         
         try:
             # 1. マスター検索
             master_id = self.find_master_by_name(place_text)
+            reused = master_id is not None
             
-            if master_id:
+            if reused:
                 # 既存マスター使用
-                self.update_master_usage(master_id)
                 self.stats['geocoding_skipped'] += 1
-                print(f"🎯 既存マスター使用: {place_text} (ID: {master_id})")
+                logger.debug("🎯 既存マスター使用: %s (ID: %s)", place_text, master_id)
             else:
                 # 新規マスター作成
                 master_id = self.create_master_place(
                     place_text, 
-                    ai_context=sentence_text,
+                    ai_context=None if skip_ai_validation else sentence_text,
                     should_geocode=True
                 )
                 
                 if not master_id:
                     return None
             
-            # 2. センテンス関係登録
-            self.register_sentence_place_relation(
-                sentence_id=sentence_id,
-                master_id=master_id,
-                matched_text=place_text,
-                extraction_method=extraction_method
-            )
+            # 使用統計更新とセンテンス関係登録は1回のコミットで書き込む
+            with self.batch():
+                if reused:
+                    self.update_master_usage(master_id, conn=self._conn)
+                
+                # 2. センテンス関係登録
+                self.register_sentence_place_relation(
+                    sentence_id=sentence_id,
+                    master_id=master_id,
+                    matched_text=place_text,
+                    extraction_method=extraction_method,
+                    conn=self._conn
+                )
             
             processing_time = time.time() - start_time
             self.stats['processing_time'] += processing_time
@@ -311,92 +584,106 @@ class PlaceMasterManagerV2:
             print(f"❌ 地名登録エラー ({place_text}): {e}")
             return None
     
-    def update_master_usage(self, master_id: int):
-        """マスター地名の使用統計更新"""
+    def update_master_usage(self, master_id: int, conn: Optional[sqlite3.Connection] = None):
+        """マスター地名の使用統計更新（conn を渡した場合はコミットを呼び出し側に任せる）"""
+        # batch() 内では回数だけ数え、終了時にまとめて加算
+        if self._batch_depth:
+            self._pending_usage[master_id] += 1
+            return
+        
         try:
-            conn = sqlite3.connect(self.db_path)
+            owns_conn = conn is None
+            if owns_conn:
+                conn = self._conn
             cursor = conn.cursor()
             
-            cursor.execute("""
-                UPDATE place_masters SET
-                    usage_count = usage_count + 1,
-                    last_used_at = CURRENT_TIMESTAMP
-                WHERE master_id = ?
-            """, (master_id,))
+            cursor.execute(MASTER_USAGE_UPDATE_SQL, (1, master_id))
             
-            conn.commit()
-            conn.close()
+            if owns_conn:
+                self._commit()
             
         except Exception as e:
             print(f"⚠️ 使用統計更新エラー (master_id: {master_id}): {e}")
     
+    def _load_sentence_context(self, cursor, sentence_id: int) -> Tuple[Optional[tuple], str, str]:
+        """センテンス情報と前後２文ずつのコンテキストを取得"""
+        cursor.execute("""
+            SELECT s.sentence_text, s.work_id, s.sentence_order,
+                   w.title, a.author_name, a.birth_year, a.death_year
+            FROM sentences s
+            JOIN works w ON s.work_id = w.work_id
+            JOIN authors a ON w.author_id = a.author_id
+            WHERE s.sentence_id = ?
+        """, (sentence_id,))
+        
+        sentence_info = cursor.fetchone()
+        if not sentence_info:
+            return None, "", ""
+        
+        work_id, sentence_order = sentence_info[1], sentence_info[2]
+        
+        # 前後２文ずつを1回の範囲検索で取得し、前後それぞれを連結
+        cursor.execute("""
+            SELECT GROUP_CONCAT(CASE WHEN sentence_order < ? THEN sentence_text END, ''),
+                   GROUP_CONCAT(CASE WHEN sentence_order > ? THEN sentence_text END, '')
+            FROM (
+                SELECT sentence_order, sentence_text
+                FROM sentences 
+                WHERE work_id = ? AND sentence_order BETWEEN ? AND ?
+                ORDER BY sentence_order
+            )
+        """, (sentence_order, sentence_order, work_id, sentence_order - 2, sentence_order + 2))
+        context_before, context_after = cursor.fetchone()
+        context_before = context_before or ""
+        context_after = context_after or ""
+        
+        return sentence_info, context_before, context_after
+    
     def register_sentence_place_relation(self, sentence_id: int, master_id: int,
-                                       matched_text: str, extraction_method: str = 'ginza'):
-        """センテンス地名関係の登録"""
+                                       matched_text: str, extraction_method: str = 'ginza',
+                                       conn: Optional[sqlite3.Connection] = None):
+        """センテンス地名関係の登録（conn を渡した場合はコミットを呼び出し側に任せる）"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            owns_conn = conn is None
+            if owns_conn:
+                conn = self._conn
             cursor = conn.cursor()
             
-            # センテンス情報とコンテキスト取得
-            cursor.execute("""
-                SELECT s.sentence_text, s.work_id, s.sentence_order,
-                       w.title, a.author_name, a.birth_year, a.death_year
-                FROM sentences s
-                JOIN works w ON s.work_id = w.work_id
-                JOIN authors a ON w.author_id = a.author_id
-                WHERE s.sentence_id = ?
-            """, (sentence_id,))
-            
-            sentence_info = cursor.fetchone()
-            if not sentence_info:
-                print(f"⚠️ センテンス情報が見つかりません: sentence_id={sentence_id}")
-                return
+            # センテンス情報とコンテキスト取得（同一センテンスの2件目以降はキャッシュを利用）
+            if self._sentence_context and self._sentence_context[0] == sentence_id:
+                _, sentence_info, context_before, context_after = self._sentence_context
+            else:
+                sentence_info, context_before, context_after = self._load_sentence_context(cursor, sentence_id)
+                if not sentence_info:
+                    print(f"⚠️ センテンス情報が見つかりません: sentence_id={sentence_id}")
+                    return
+                self._sentence_context = (sentence_id, sentence_info, context_before, context_after)
             
             sentence_text, work_id, sentence_order, work_title, author_name, birth_year, death_year = sentence_info
             
-            # 前後２文ずつ取得
-            cursor.execute("""
-                SELECT GROUP_CONCAT(sentence_text, '') 
-                FROM sentences 
-                WHERE work_id = ? AND sentence_order >= ? AND sentence_order < ?
-                ORDER BY sentence_order
-            """, (work_id, sentence_order - 2, sentence_order))
-            context_before_result = cursor.fetchone()
-            context_before = context_before_result[0] if context_before_result and context_before_result[0] else ""
-            
-            cursor.execute("""
-                SELECT GROUP_CONCAT(sentence_text, '') 
-                FROM sentences 
-                WHERE work_id = ? AND sentence_order > ? AND sentence_order <= ?
-                ORDER BY sentence_order
-            """, (work_id, sentence_order, sentence_order + 2))
-            context_after_result = cursor.fetchone()
-            context_after = context_after_result[0] if context_after_result and context_after_result[0] else ""
-            
-            # matched_textは地名のみにする（place_mastersから取得）
-            cursor.execute("SELECT display_name FROM place_masters WHERE master_id = ?", (master_id,))
-            place_result = cursor.fetchone()
-            place_text = place_result[0] if place_result else matched_text
+            # matched_textは地名のみにする（検索・作成時に控えた表示名、なければplace_mastersから取得）
+            place_text = self._display_names.get(master_id)
+            if place_text is None:
+                cursor.execute("SELECT display_name FROM place_masters WHERE master_id = ?", (master_id,))
+                place_result = cursor.fetchone()
+                place_text = place_result[0] if place_result else matched_text
             
             # 文中位置計算（地名の位置）
             position_in_sentence = sentence_text.find(place_text) if sentence_text else -1
             
-            cursor.execute("""
-                INSERT OR REPLACE INTO sentence_places (
-                    sentence_id, master_id, matched_text, place_name, full_sentence,
-                    extraction_method, extraction_confidence,
-                    context_before, context_after,
-                    author_name, author_birth_year, author_death_year,
-                    work_title, position_in_sentence,
-                    quality_score, relevance_score, verification_status,
-                    created_at
-                ) VALUES (?, ?, ?, ?, ?, ?, 0.8, ?, ?, ?, ?, ?, ?, ?, 0.8, 0.8, 'auto', CURRENT_TIMESTAMP)
-            """, (sentence_id, master_id, place_text, place_text, sentence_text, extraction_method,
-                  context_before, context_after, author_name, birth_year, death_year,
-                  work_title, position_in_sentence))
-            
-            conn.commit()
-            conn.close()
+            relation = (sentence_id, master_id, place_text, place_text, sentence_text, extraction_method,
+                        context_before, context_after, author_name, birth_year, death_year,
+                        work_title, position_in_sentence)
+            
+            # batch() 内ではまとめて executemany するため保留
+            if self._batch_depth:
+                self._pending_relations.append(relation)
+                return
+            
+            cursor.execute(SENTENCE_PLACE_INSERT_SQL, relation)
+            
+            if owns_conn:
+                self._commit()
             
         except Exception as e:
             print(f"❌ センテンス関係登録エラー: {e}")
@@ -404,7 +691,7 @@ class PlaceMasterManagerV2:
     def get_master_statistics(self) -> Dict:
         """マスター統計情報取得"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._conn
             cursor = conn.cursor()
             
             # 基本統計
@@ -430,8 +717,6 @@ class PlaceMasterManagerV2:
             
             type_stats = cursor.fetchall()
             
-            conn.close()
-            
             return {
                 'total_masters': basic_stats[0],
                 'geocoded_masters': basic_stats[1],
@@ -453,6 +738,11 @@ class PlaceMasterManagerV2:
             print(f"❌ 統計情報取得エラー: {e}")
             return {}
     
+    def close(self):
+        """データベース接続を閉じる（長時間利用した統計をクエリプランナーへ反映してから閉じる）"""
+        self._conn.execute("PRAGMA optimize")
+        self._conn.close()
+    
     def print_statistics(self):
         """統計情報の表示"""
         stats = self.get_master_statistics()
@@ -494,6 +784,7 @@ def main():
         print(f"結果: master_id = {master_id}")
     
     manager.print_statistics()
+    manager.close()
 
 
 if __name__ == "__main__":
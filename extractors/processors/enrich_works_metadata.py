@@ -5,6 +5,7 @@
 
 import sys
 import os
+from typing import Any, Dict, Optional
 
 # パス設定
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -13,34 +14,44 @@ sys.path.append(parent_dir)
 
 from ..aozora.aozora_metadata_extractor import AozoraMetadataExtractor
 
+def run(extractor: Optional[AozoraMetadataExtractor] = None) -> Dict[str, Any]:
+    """全作品のメタデータを一括補完し、処理結果を返す（パイプラインから直接呼び出し可能）"""
+    extractor = extractor or AozoraMetadataExtractor()
+    
+    # プレビュー表示
+    print("📋 補完対象確認中...")
+    preview_result = extractor.preview_missing_metadata()
+    
+    if preview_result['missing_count'] == 0:
+        print("✅ 全ての作品メタデータが既に完全です！")
+        return {'success': True, 'enriched_count': 0, 'errors': []}
+    
+    # 実行確認
+    print(f"\n🚀 {preview_result['missing_count']} 件の作品を処理します")
+    print("⏱️  処理時間の目安: 約 {} 秒".format(preview_result['missing_count']))
+    
+    # 一括処理実行（確認プロンプトをスキップ）
+    print("\n🔄 メタデータ一括補完開始...")
+    results = extractor.enrich_all_works()
+    
+    # 結果表示
+    extractor.print_statistics()
+    
+    print(f"🎉 全作品メタデータ補完が完了しました！")
+    
+    return {
+        'success': True,
+        'enriched_count': results.get('success_count', 0),
+        'errors': []
+    }
+
 def main():
     """全作品のメタデータを一括補完"""
     print("🌟 全作品メタデータ一括補完システム開始")
     print("="*60)
     
     try:
-        extractor = AozoraMetadataExtractor()
-        
-        # プレビュー表示
-        print("📋 補完対象確認中...")
-        preview_result = extractor.preview_missing_metadata()
-        
-        if preview_result['missing_count'] == 0:
-            print("✅ 全ての作品メタデータが既に完全です！")
-            return
-        
-        # 実行確認
-        print(f"\n🚀 {preview_result['missing_count']} 件の作品を処理します")
-        print("⏱️  処理時間の目安: 約 {} 秒".format(preview_result['missing_count']))
-        
-        # 一括処理実行（確認プロンプトをスキップ）
-        print("\n🔄 メタデータ一括補完開始...")
-        results = extractor.enrich_all_works()
-        
-        # 結果表示
-        extractor.print_statistics()
-        
-        print(f"🎉 全作品メタデータ補完が完了しました！")
+        run()
         
     except KeyboardInterrupt:
         print("\n⚠️ 処理が中断されました")
@@ -63,6 +63,7 @@ class TextProcessor:
         
         # 文分割パターン
         self.sentence_pattern = re.compile(r'[。．！？!?]+')
+        self.sentence_end_chars = frozenset('。．！？!?')
         
         logger.info("📝 改良版テキスト処理システム初期化完了")
     
@@ -139,20 +140,22 @@ class TextProcessor:
         # 改行を空白に置換
         text = text.replace('\n', ' ')
         
-        # 文末記号で分割
+        # 文末記号で分割（1回の走査で文末位置までをスライス）
         sentences = []
-        current = ""
+        end_chars = self.sentence_end_chars
+        start = 0
         
-        for char in text:
-            current += char
-            if self.sentence_pattern.search(char):
-                if current.strip() and len(current.strip()) > 5:  # 最小文長制限
-                    sentences.append(current.strip())
-                current = ""
+        for i, char in enumerate(text):
+            if char in end_chars:
+                sentence = text[start:i + 1].strip()
+                if len(sentence) > 5:  # 最小文長制限
+                    sentences.append(sentence)
+                start = i + 1
         
         # 最後の文を追加
-        if current.strip() and len(current.strip()) > 5:
-            sentences.append(current.strip())
+        sentence = text[start:].strip()
+        if len(sentence) > 5:
+            sentences.append(sentence)
         
         # 短すぎる文や長すぎる文をフィルタリング
         filtered_sentences = []
@@ -6,17 +6,24 @@ sentence_placesテーブルのwork_publication_year更新スクリプト
 import sqlite3
 import sys
 from pathlib import Path
+from typing import Any, Dict, Optional
 
-def update_work_publication_year():
-    """sentence_placesテーブルのwork_publication_yearを更新"""
-    
-    db_path = Path("../data/bungo_map.db")
-    if not db_path.exists():
-        print(f"エラー: データベースファイル {db_path} が見つかりません")
-        return False
+DEFAULT_DB_PATH = "../data/bungo_map.db"
+
+def run(db_path=DEFAULT_DB_PATH, conn: Optional[sqlite3.Connection] = None) -> Dict[str, Any]:
+    """work_publication_yearを補完し、処理結果を返す（パイプラインから直接呼び出し可能）
+
+    conn を渡した場合はその接続を使い、呼び出し側で閉じる。
+    """
+    owns_conn = conn is None
+    if owns_conn:
+        db_path = Path(db_path)
+        if not db_path.exists():
+            print(f"エラー: データベースファイル {db_path} が見つかりません")
+            return {'success': False, 'updated_count': 0, 'errors': [f"データベースファイル {db_path} が見つかりません"]}
+        conn = sqlite3.connect(db_path)
     
     try:
-        conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
         print("📅 work_publication_year更新中...")
@@ -28,7 +35,7 @@ def update_work_publication_year():
         
         if null_count == 0:
             print("✅ 既に全レコードが設定済みです")
-            return True
+            return {'success': True, 'updated_count': 0, 'errors': []}
         
         # work_publication_yearを更新
         update_query = """
@@ -72,15 +79,21 @@ def update_work_publication_year():
         for i, (title, year, place) in enumerate(samples, 1):
             print(f"  {i}. {title} ({year}年) - {place}")
         
-        conn.close()
         print("\n🎉 work_publication_year更新完了！")
-        return True
+        return {'success': True, 'updated_count': updated_count, 'errors': []}
         
     except Exception as e:
         print(f"❌ エラーが発生しました: {e}")
-        if 'conn' in locals():
+        conn.rollback()
+        return {'success': False, 'updated_count': 0, 'errors': [str(e)]}
+    
+    finally:
+        if owns_conn:
             conn.close()
-        return False
+
+def update_work_publication_year() -> bool:
+    """sentence_placesテーブルのwork_publication_yearを更新"""
+    return run()['success']
 
 if __name__ == "__main__":
     success = update_work_publication_year()
@@ -0,0 +1,280 @@
+"""
+地名マスター管理のテスト
+目的: 使用回数の一括加算・未検出キャッシュの破棄・センテンス関係の一括登録・マスター作成の競合・trigram索引での部分一致の確認
+"""
+
+import pytest
+import tempfile
+import shutil
+import sqlite3
+from pathlib import Path
+from unittest.mock import patch
+
+import extractors.places.place_master_manager as place_master_manager
+from extractors.places.place_master_manager import PlaceMasterManagerV2
+from database.init_db import DatabaseInitializerV2
+
+class TestPlaceMasterManagerBatch:
+    """batch() 内の書き込み・マスター作成・部分一致検索のテスト"""
+    
+    @pytest.fixture
+    def temp_db_path(self):
+        """テスト用の一時データベース（地名登録で参照・更新する列のみ）"""
+        temp_dir = tempfile.mkdtemp()
+        db_path = Path(temp_dir) / "test_place_master.db"
+        
+        conn = sqlite3.connect(db_path)
+        conn.executescript("""
+            CREATE TABLE authors (
+                author_id INTEGER PRIMARY KEY,
+                author_name TEXT NOT NULL,
+                birth_year INTEGER,
+                death_year INTEGER
+            );
+            
+            CREATE TABLE works (
+                work_id INTEGER PRIMARY KEY,
+                author_id INTEGER,
+                title TEXT NOT NULL
+            );
+            
+            CREATE TABLE sentences (
+                sentence_id INTEGER PRIMARY KEY,
+                work_id INTEGER NOT NULL,
+                sentence_order INTEGER NOT NULL,
+                sentence_text TEXT NOT NULL
+            );
+            
+            CREATE TABLE place_masters (
+                master_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                normalized_name VARCHAR(255) NOT NULL UNIQUE,
+                display_name VARCHAR(255) NOT NULL,
+                canonical_name VARCHAR(255),
+                latitude FLOAT,
+                longitude FLOAT,
+                geocoding_source VARCHAR(100),
+                geocoding_confidence FLOAT,
+                geocoding_timestamp DATETIME,
+                usage_count INTEGER DEFAULT 0,
+                first_used_at DATETIME,
+                last_used_at DATETIME,
+                validation_status VARCHAR(20) DEFAULT 'pending',
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+            
+            CREATE TABLE place_aliases (
+                alias_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                master_id INTEGER NOT NULL,
+                alias_name VARCHAR(255) NOT NULL
+            );
+            
+            CREATE TABLE sentence_places (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sentence_id INTEGER NOT NULL,
+                master_id INTEGER NOT NULL,
+                matched_text TEXT,
+                place_name TEXT,
+                full_sentence TEXT,
+                extraction_method TEXT,
+                extraction_confidence FLOAT,
+                context_before TEXT,
+                context_after TEXT,
+                author_name TEXT,
+                author_birth_year INTEGER,
+                author_death_year INTEGER,
+                work_title TEXT,
+                position_in_sentence INTEGER,
+                quality_score FLOAT,
+                relevance_score FLOAT,
+                verification_status TEXT,
+                created_at DATETIME,
+                UNIQUE (sentence_id, master_id, matched_text)
+            );
+            
+            INSERT INTO authors VALUES (1, '夏目漱石', 1867, 1916);
+            INSERT INTO works VALUES (1, 1, 'こころ');
+            INSERT INTO sentences VALUES
+                (1, 1, 1, '私は東京から京都へ向かった。'),
+                (2, 1, 2, '東京の空は曇っていた。'),
+                (3, 1, 3, '京都の宿に着いた。');
+            INSERT INTO place_masters (normalized_name, display_name, usage_count, validation_status) VALUES
+                ('東京', '東京', 1, 'validated'),
+                ('京都', '京都', 1, 'validated');
+        """)
+        conn.commit()
+        conn.close()
+        
+        yield str(db_path)
+        shutil.rmtree(temp_dir)
+    
+    @pytest.fixture
+    def trigram_db_path(self, temp_db_path):
+        """部分一致検索用の trigram 索引を init_db と同じ手順で作成した一時データベース"""
+        conn = sqlite3.connect(temp_db_path)
+        conn.execute(
+            "INSERT INTO place_masters (normalized_name, display_name, usage_count, validation_status) "
+            "VALUES ('東京都千代田区', '東京都千代田区', 1, 'validated')"
+        )
+        DatabaseInitializerV2()._create_place_trigram_index(conn.cursor())
+        conn.commit()
+        conn.close()
+        
+        return temp_db_path
+    
+    def _create_manager(self, db_path):
+        """一時データベースに接続した地名マスター管理（外部API・DB管理はモック）"""
+        real_connect = sqlite3.connect
+        with patch.object(place_master_manager, 'DatabaseManager'), \
+             patch.object(place_master_manager, 'LLMClient'), \
+             patch.object(place_master_manager, 'GeocodingEngine'), \
+             patch.object(place_master_manager.sqlite3, 'connect', side_effect=lambda _: real_connect(db_path)):
+            return PlaceMasterManagerV2()
+    
+    @pytest.fixture
+    def manager(self, temp_db_path):
+        """trigram 索引なし（部分一致はLIKEで走査）の地名マスター管理"""
+        manager = self._create_manager(temp_db_path)
+        yield manager
+        manager.close()
+    
+    @pytest.fixture
+    def trigram_manager(self, trigram_db_path):
+        """trigram 索引ありの地名マスター管理"""
+        manager = self._create_manager(trigram_db_path)
+        yield manager
+        manager.close()
+    
+    def _usage_counts(self, db_path):
+        """別接続から見た表示名 → 使用回数"""
+        conn = sqlite3.connect(db_path)
+        try:
+            return dict(conn.execute("SELECT display_name, usage_count FROM place_masters"))
+        finally:
+            conn.close()
+    
+    def _relation_count(self, db_path):
+        """別接続から見たセンテンス地名関係の件数（コミット済みのもののみ）"""
+        conn = sqlite3.connect(db_path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM sentence_places").fetchone()[0]
+        finally:
+            conn.close()
+    
+    def test_usage_counts_after_batch_with_repeated_masters(self, manager, temp_db_path):
+        """同じマスターを繰り返し使った回数がバッチ終了時にまとめて加算されること"""
+        with manager.batch():
+            manager.extract_and_register_place('東京', sentence_id=1)
+            manager.extract_and_register_place('京都', sentence_id=1)
+            manager.extract_and_register_place('東京', sentence_id=2)
+            manager.extract_and_register_place('京都', sentence_id=3)
+            manager.extract_and_register_place('東京', sentence_id=2)
+            
+            # バッチ中はマスターごとの回数を保持するのみ
+            assert manager._pending_usage == {1: 3, 2: 2}
+            assert self._usage_counts(temp_db_path) == {'東京': 1, '京都': 1}
+        
+        assert manager._pending_usage == {}
+        assert self._usage_counts(temp_db_path) == {'東京': 4, '京都': 3}
+    
+    def test_miss_cache_invalidated_by_master_created_in_same_batch(self, manager):
+        """同じバッチ内で作成したマスターが、作成前に見つからなかった地名の検索に反映されること"""
+        with manager.batch():
+            assert manager.find_master_by_name('千代田区') is None
+            assert manager.find_master_by_name('大阪') is None
+            assert '千代田区' in manager._miss_cache
+            
+            master_id = manager.create_master_place('東京都千代田区', should_geocode=False)
+            assert master_id is not None
+            assert manager._miss_cache == {}
+            
+            # 部分一致で新規マスターに解決される
+            assert manager.find_master_by_name('千代田区') == master_id
+            
+            osaka_id = manager.create_master_place('大阪', should_geocode=False)
+            assert manager.find_master_by_name('大阪') == osaka_id
+    
+    def test_relations_flushed_on_batch_exit(self, manager, temp_db_path):
+        """センテンス地名関係がバッチ終了時に一括登録・コミットされること"""
+        with manager.batch():
+            manager.register_sentence_place_relation(1, 1, '東京')
+            manager.register_sentence_place_relation(1, 2, '京都')
+            
+            assert len(manager._pending_relations) == 2
+            assert self._relation_count(temp_db_path) == 0
+        
+        assert manager._pending_relations == []
+        assert self._relation_count(temp_db_path) == 2
+    
+    def test_relations_flushed_on_exception(self, manager, temp_db_path):
+        """バッチ内で例外が発生しても保留中のセンテンス地名関係が登録されること"""
+        with pytest.raises(RuntimeError):
+            with manager.batch():
+                manager.register_sentence_place_relation(2, 1, '東京')
+                manager.update_master_usage(1)
+                raise RuntimeError("抽出処理の失敗")
+        
+        assert manager._pending_relations == []
+        assert manager._batch_depth == 0
+        assert self._relation_count(temp_db_path) == 1
+        assert self._usage_counts(temp_db_path)['東京'] == 2
+
+    def test_create_master_skips_rejected_master(self, manager, temp_db_path):
+        """却下済みマスターと同じ正規化名では作成・使用回数加算をせず None を返すこと"""
+        manager._conn.execute(
+            "INSERT INTO place_masters (normalized_name, display_name, usage_count, validation_status) "
+            "VALUES ('沢山', '沢山', 5, 'rejected')"
+        )
+        manager._conn.commit()
+        
+        assert manager.find_master_by_name('沢山') is None
+        assert manager.create_master_place('沢山', should_geocode=False) is None
+        
+        assert self._usage_counts(temp_db_path)['沢山'] == 5
+        assert manager.find_master_by_name('沢山') is None
+        assert manager.stats['new_masters'] == 0
+    
+    def test_create_master_conflict_uses_stored_display_name(self, manager, temp_db_path):
+        """登録済みの正規化名と競合した場合は既存IDと保存済みの表示名を使うこと"""
+        cursor = manager._conn.execute(
+            "INSERT INTO place_masters (normalized_name, display_name, usage_count, validation_status) "
+            "VALUES ('江戸', '江戸の町', 2, 'validated')"
+        )
+        existing_id = cursor.lastrowid
+        manager._conn.commit()
+        
+        # 検索後に他の接続が登録した場合と同じく、検索を経ずに作成する
+        assert manager.create_master_place('江戸', should_geocode=False) == existing_id
+        assert manager.stats['new_masters'] == 0
+        assert self._usage_counts(temp_db_path)['江戸の町'] == 3
+        
+        manager.register_sentence_place_relation(1, existing_id, '江戸')
+        conn = sqlite3.connect(temp_db_path)
+        try:
+            matched_text = conn.execute(
+                "SELECT matched_text FROM sentence_places WHERE master_id = ?", (existing_id,)
+            ).fetchone()[0]
+        finally:
+            conn.close()
+        assert matched_text == '江戸の町'
+    
+    def test_partial_match_uses_trigram_index(self, trigram_manager):
+        """索引作成前からあるマスター・作成後に追加したマスターがともに trigram 索引で部分一致すること"""
+        assert trigram_manager._has_place_fts
+        assert trigram_manager.find_master_by_name('千代田区') == 3
+        
+        master_id = trigram_manager.create_master_place('鶴岡八幡宮', should_geocode=False)
+        assert trigram_manager.find_master_by_name('八幡宮') == master_id
+    
+    def test_unpopulated_trigram_index_falls_back_to_like(self, trigram_db_path):
+        """索引が空の場合は trigram 索引を使わず LIKE で部分一致すること"""
+        conn = sqlite3.connect(trigram_db_path)
+        conn.execute("INSERT INTO place_masters_trigram (place_masters_trigram) VALUES ('delete-all')")
+        conn.commit()
+        conn.close()
+        
+        manager = self._create_manager(trigram_db_path)
+        try:
+            assert not manager._has_place_fts
+            assert manager.find_master_by_name('千代田区') == 3
+        finally:
+            manager.close()